@@ -1,4 +1,5 @@
 #!/bin/bash
 # This script is used to start the FastAPI application using Uvicorn in Ubuntu.
-uvicorn main:app --reload --host 0.0.0.0 --port 8000
+# Production mode with preforked workers; pass --reload for a single auto-reloading development process.
+python server.py --host 0.0.0.0 --port 8000 "$@"
 # This script starts the FastAPI application using Uvicorn.
\ No newline at end of file
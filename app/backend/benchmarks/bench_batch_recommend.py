@@ -0,0 +1,84 @@
+"""
+Batch recommendation throughput: per-profile Python scoring vs recommend_batch.
+
+Uses the seeded LIC plan catalog and random profiles, and checks that the batch
+result equals the first top_k entries of the single-profile result for every profile.
+
+    python benchmarks/bench_batch_recommend.py --profiles 100000 --top-k 3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.models import LICPlan  # noqa: E402
+from utils.planCatalog import PlanCatalog  # noqa: E402
+from utils.recommender import recommend_batch, recommend_plans  # noqa: E402
+from utils.seeds_plans import seed_initial_plans  # noqa: E402
+
+
+class _CaptureSession:
+    """Collects the plans seed_initial_plans would insert, without a database"""
+    def __init__(self):
+        self.plans = []
+
+    def execute(self, statement):
+        # The "plans already seeded?" EXISTS check
+        return SimpleNamespace(scalar=lambda: False)
+
+    def add(self, plan: LICPlan):
+        self.plans.append(SimpleNamespace(id=len(self.plans) + 1, **{
+            column.name: getattr(plan, column.name) for column in LICPlan.__table__.columns if column.name != "id"
+        }))
+
+    def commit(self):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=100_000)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    session = _CaptureSession()
+    seed_initial_plans(session)
+    catalog = PlanCatalog()
+    catalog.build(session.plans)
+
+    rng = random.Random(args.seed)
+    ages = [rng.randint(18, 100) for _ in range(args.profiles)]
+    risks = [rng.choice(("low", "medium", "high")) for _ in range(args.profiles)]
+    dependents = [rng.randint(0, 8) for _ in range(args.profiles)]
+
+    started = time.perf_counter()
+    expected = [
+        recommend_plans(catalog.candidates(age, risk), age, risk, dependent)[:args.top_k]
+        for age, risk, dependent in zip(ages, risks, dependents)
+    ]
+    loop_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = recommend_batch(catalog.plans, ages, risks, dependents, top_k=args.top_k)
+    batch_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = [batch.for_profile(index) for index in range(len(batch))]
+    format_time = time.perf_counter() - started
+
+    mismatches = sum(1 for left, right in zip(expected, actual) if left != right)
+    print(f"profiles: {args.profiles}, plans: {len(catalog.plans)}, top_k: {args.top_k}")
+    print(f"per-profile loop : {loop_time:7.3f}s  ({args.profiles / loop_time:10.0f} profiles/s)")
+    print(f"recommend_batch  : {batch_time:7.3f}s  ({args.profiles / batch_time:10.0f} profiles/s)")
+    print(f"  + formatting dicts: {format_time:.3f}s")
+    print(f"mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
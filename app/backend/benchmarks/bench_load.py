@@ -0,0 +1,294 @@
+"""
+Offline end-to-end load test for the user flow endpoints.
+
+Runs the FastAPI app in-process (lifespan included) against a temporary SQLite database
+and the local SMTP sink, and drives a weighted mix of /signup/, /send-otp/, /verify-otp/
+and /save-user-history/ from concurrent clients. OTPs for /verify-otp/ are read back from
+the emails the sink received, so the whole send -> deliver -> verify path is exercised.
+
+Reports requests/s, p50/p95/p99 latency and error rate per endpoint and writes them as
+JSON (with the git commit) so runs can be compared across commits:
+
+    python benchmarks/bench_load.py --concurrency 32 --duration 20
+    python benchmarks/bench_load.py --compare benchmarks/results/load_<previous>.json
+
+Any other configuration (HISTORY_WRITE_BEHIND, SMTP_POOL_SIZE, OTP_STORE, ...) is read
+from the environment as usual. Set DATABASE_URL to run against a real database instead.
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.smtpSink import LocalSMTPSink  # noqa: E402
+from utils.statsHelper import latency_summary  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = ("signup", "send_otp", "verify_otp", "save_history")
+DEFAULT_MIX = "signup=1,send_otp=3,verify_otp=3,save_history=3"
+OTP_PATTERN = re.compile(rb"verification code is: <strong>(\d+)</strong>")
+TO_PATTERN = re.compile(rb"^To: (.+?)\r?$", re.MULTILINE)
+
+
+class DeliveredOTPs:
+    """OTPs parsed from the messages the SMTP sink has accepted, by recipient"""
+
+    def __init__(self, sink: LocalSMTPSink):
+        self.sink = sink
+        self.parsed = 0
+        self.codes = {}
+
+    def pop(self):
+        messages = self.sink.messages
+        while self.parsed < len(messages):
+            message = messages[self.parsed]
+            self.parsed += 1
+            recipient, otp = TO_PATTERN.search(message), OTP_PATTERN.search(message)
+            if recipient and otp:
+                self.codes[recipient.group(1).decode()] = int(otp.group(1))
+        return self.codes.popitem() if self.codes else None
+
+
+class LoadRun:
+    def __init__(self, client, users, otps: DeliveredOTPs, rng: random.Random):
+        self.client = client
+        self.users = users
+        self.otps = otps
+        self.rng = rng
+        self.signups = 0
+        self.awaiting_verify = set()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    async def signup(self):
+        self.signups += 1
+        return await self.client.post("/signup/", json={
+            "name": "Load Tester",
+            "email": f"load-{os.getpid()}-{self.signups}@example.com",
+            "dateOfBirth": "1990-04-12",
+        })
+
+    async def send_otp(self):
+        # Skip users with an unverified code in flight: a resend would replace it and fail that verify
+        _, email = self.rng.choice(self.users)
+        for _ in range(10):
+            if email not in self.awaiting_verify:
+                break
+            _, email = self.rng.choice(self.users)
+        self.awaiting_verify.add(email)
+        return await self.client.post("/send-otp/", json={"email": email})
+
+    async def verify_otp(self):
+        delivered = self.otps.pop()
+        if delivered is None:
+            # Nothing delivered yet to verify against; request one so later verifies have codes
+            return None
+        email, otp = delivered
+        try:
+            return await self.client.post("/verify-otp/", json={"email": email, "otp": otp})
+        finally:
+            self.awaiting_verify.discard(email)
+
+    async def save_history(self):
+        user_id, _ = self.rng.choice(self.users)
+        return await self.client.post("/save-user-history/", json={
+            "user_id": user_id,
+            "age": self.rng.randint(18, 60),
+            "annual_income": self.rng.randint(200_000, 5_000_000),
+            "no_of_dependent": self.rng.randint(0, 6),
+            "risk_capacity": self.rng.choice(("low", "medium", "high")),
+        })
+
+    async def request(self, endpoint: str, record: bool = True) -> None:
+        started = time.perf_counter()
+        try:
+            response = await getattr(self, endpoint)()
+            if response is None:
+                endpoint = "send_otp"
+                started = time.perf_counter()
+                response = await self.send_otp()
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        if not record:
+            return
+        self.latencies[endpoint].append(elapsed)
+        self.statuses[endpoint][status] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors[endpoint] += 1
+
+
+async def client_loop(run: LoadRun, endpoints, weights, deadline: float, budget: list) -> None:
+    while time.perf_counter() < deadline and budget[0] != 0:
+        budget[0] -= 1
+        await run.request(run.rng.choices(endpoints, weights)[0])
+
+
+def parse_mix(mix: str):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint in --mix: {name!r} (expected one of {', '.join(ENDPOINTS)})")
+        weights[name.strip()] = float(weight or 1)
+    return list(weights), list(weights.values())
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(run: LoadRun, elapsed: float):
+    endpoints = {}
+    for endpoint in ENDPOINTS:
+        samples = run.latencies.get(endpoint, [])
+        if not samples:
+            continue
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "rps": round(len(samples) / elapsed, 1),
+            "latency_ms": latency_summary(samples),
+            "error_rate": round(run.errors[endpoint] / len(samples), 4),
+            "statuses": {str(status): count for status, count in sorted(run.statuses[endpoint].items(), key=str)},
+        }
+    everything = [sample for samples in run.latencies.values() for sample in samples]
+    total = {
+        "requests": len(everything),
+        "rps": round(len(everything) / elapsed, 1),
+        "latency_ms": latency_summary(everything),
+        "error_rate": round(sum(run.errors.values()) / len(everything), 4) if everything else None,
+    }
+    return endpoints, total
+
+
+def print_table(endpoints, total, baseline=None) -> None:
+    print(f"{'endpoint':<14}{'requests':>9}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for name, stats in list(endpoints.items()) + [("total", total)]:
+        latency = stats["latency_ms"]
+        line = (f"{name:<14}{stats['requests']:>9}{stats['rps']:>10.1f}{latency['p50']:>10.2f}"
+                f"{latency['p95']:>10.2f}{latency['p99']:>10.2f}{stats['error_rate']:>9.2%}")
+        if baseline:
+            previous = baseline["total"] if name == "total" else baseline["endpoints"].get(name)
+        if baseline and previous:
+            line += (f"   req/s {stats['rps'] / previous['rps'] - 1:+.1%}"
+                     f"  p95 {latency['p95'] / previous['latency_ms']['p95'] - 1:+.1%}")
+        print(line)
+
+
+async def run_load(args, sink: LocalSMTPSink) -> dict:
+    import httpx
+    import main
+    from utils.dbHelper import DBHelper
+    from utils.models import SessionLocal, User, get_engine
+
+    app = main.app
+    async with app.router.lifespan_context(app):
+        if get_engine().dialect.name == "sqlite":
+            with get_engine().connect() as conn:
+                conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        with SessionLocal() as db:
+            emails = [f"seed-{os.getpid()}-{index}@example.com" for index in range(args.users)]
+            ids = DBHelper(db).create_many(User, [
+                {"name": "Seed User", "email": email, "date_of_birth": 1, "month_of_birth": 1, "year_of_birth": 1990}
+                for email in emails
+            ])
+        users = list(zip(ids, emails))
+
+        rng = random.Random(args.seed)
+        endpoints, weights = parse_mix(args.mix)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://safecheck.bench") as client:
+            run = LoadRun(client, users, DeliveredOTPs(sink), rng)
+            for endpoint in endpoints:
+                for _ in range(args.warmup):
+                    await run.request(endpoint, record=False)
+
+            budget = [args.requests or -1]
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(
+                client_loop(run, endpoints, weights, deadline, budget) for _ in range(args.concurrency)
+            ))
+            elapsed = time.perf_counter() - started
+
+    endpoint_stats, total = summarize(run, elapsed)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "database": get_engine().dialect.name,
+        "config": {**vars(args), "elapsed_s": round(elapsed, 3)},
+        "endpoints": endpoint_stats,
+        "total": total,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0: run for --duration)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint weights")
+    parser.add_argument("--users", type=int, default=1000, help="users created before the run")
+    parser.add_argument("--warmup", type=int, default=20, help="unrecorded requests per endpoint before the run")
+    parser.add_argument("--smtp-latency", type=float, default=0.0, help="simulated relay latency per email (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/load_<commit>_<time>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    sink = LocalSMTPSink(port=0, latency=args.smtp_latency, keep_messages=True).start_in_thread()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'load.db')}")
+    os.environ.update({
+        "SMTP_SERVER": sink.host, "SMTP_PORT": str(sink.port), "SMTP_USE_TLS": "false",
+        "SMTP_USERNAME": "bench@safecheck.local", "SMTP_PASSWORD": "bench",
+    })
+    os.environ.setdefault("OTP_STORE_PATH", os.path.join(workdir, "otp.db"))
+    os.environ.setdefault("DB_POOL_MIN", "0")
+    # Every simulated client shares one address and re-requests OTPs far faster than a
+    # person would; measure throughput, not the /send-otp/ rate limits
+    for name in ("OTP_RATE_IP_PER_MINUTE", "OTP_RATE_IP_BURST", "OTP_RATE_EMAIL_PER_MINUTE", "OTP_RATE_EMAIL_BURST"):
+        os.environ.setdefault(name, "1000000")
+
+    try:
+        results = asyncio.run(run_load(args, sink))
+    finally:
+        sink.stop()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"compared with {args.compare} (commit {baseline.get('commit')})")
+    print_table(results["endpoints"], results["total"], baseline)
+
+    output = args.output or os.path.join(
+        BENCH_DIR, "results", f"load_{results['commit'] or 'nocommit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-request cost of the metrics middleware.
+
+Drives a minimal FastAPI app through the ASGI interface (no sockets, no HTTP client)
+with and without MetricsMiddleware and reports the difference per request, along
+with the cost of a bare registry update and of rendering /metrics.
+
+    python benchmarks/bench_metrics_overhead.py --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI  # noqa: E402
+
+from utils.metrics import MetricsMiddleware, MetricsRegistry  # noqa: E402
+
+
+def build_app(registry: MetricsRegistry = None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/users/{user_id}/history")
+    async def history(user_id: int):
+        return {"user_id": user_id}
+
+    if registry is not None:
+        app.add_middleware(MetricsMiddleware, registry=registry)
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for index in range(requests):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/users/{index % 500}/history", "raw_path": b"", "root_path": "",
+            "query_string": b"", "headers": [], "client": ("127.0.0.1", 1234), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    plain, instrumented = build_app(), build_app(registry)
+    asyncio.run(drive(plain, 1000))
+    asyncio.run(drive(instrumented, 1000))
+
+    # Interleave rounds and keep the best of each so background noise doesn't decide the result
+    plain_best = instrumented_best = float("inf")
+    for _ in range(args.rounds):
+        plain_best = min(plain_best, asyncio.run(drive(plain, args.requests)))
+        instrumented_best = min(instrumented_best, asyncio.run(drive(instrumented, args.requests)))
+
+    plain_us = plain_best / args.requests * 1e6
+    instrumented_us = instrumented_best / args.requests * 1e6
+    print(f"without middleware   {plain_us:8.2f} us/request")
+    print(f"with middleware      {instrumented_us:8.2f} us/request")
+    print(f"overhead             {instrumented_us - plain_us:8.2f} us/request "
+          f"({(instrumented_us - plain_us) / plain_us:.1%})")
+
+    bare = MetricsRegistry()
+    started = time.perf_counter()
+    for index in range(args.requests):
+        bare.observe("GET", "/users/{user_id}/history", 200, (index % 100) / 1000)
+    print(f"registry.observe     {(time.perf_counter() - started) / args.requests * 1e6:8.2f} us/call")
+
+    for index in range(50):
+        bare.observe("POST", f"/route-{index}", 201, 0.01)
+    started = time.perf_counter()
+    body = bare.render()
+    print(f"render /metrics      {(time.perf_counter() - started) * 1000:8.2f} ms "
+          f"({len(bare.routes)} routes, {len(body)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+OTP store throughput and footprint.
+
+Fills each backend with pending codes and measures put/get rates; for the in-process
+store it also reports memory per pending code.
+
+    python benchmarks/bench_otp_store.py --entries 1000000 --sqlite-entries 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.otpStore import InMemoryOTPStore, SQLiteOTPStore  # noqa: E402
+
+
+def fill(store, entries: int) -> float:
+    started = time.perf_counter()
+    for index in range(entries):
+        store.put(f"user{index}@example.com", f"{index % 1000000:06d}")
+    return time.perf_counter() - started
+
+
+def lookup(store, entries: int) -> float:
+    started = time.perf_counter()
+    for index in range(entries):
+        assert store.get(f"user{index}@example.com") is not None
+    return time.perf_counter() - started
+
+
+def report(name: str, entries: int, put_time: float, get_time: float) -> None:
+    print(f"{name:<10} {entries:>9} codes  put {entries / put_time:>10.0f}/s  get {entries / get_time:>10.0f}/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--sqlite-entries", type=int, default=50_000)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    store = InMemoryOTPStore(ttl=300)
+    put_time = fill(store, args.entries)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    get_time = lookup(store, args.entries)
+    report("memory", len(store), put_time, get_time)
+    print(f"{'':<10} {current / args.entries:.0f} bytes per pending code")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteOTPStore(os.path.join(tmp, "otp.sqlite3"), ttl=300)
+        put_time = fill(store, args.sqlite_entries)
+        get_time = lookup(store, args.sqlite_entries)
+        report("sqlite", len(store), put_time, get_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Response envelope cost: the previous dict + JSONResponse handler vs APIResponseHandler.
+
+Builds single-profile, batch-sized recommendation payloads and a static error, checks
+that both handlers produce the same JSON (ignoring the timestamp) and reports the time
+per response, including rendering the body.
+
+    python benchmarks/bench_response_envelope.py --iterations 2000 --batch-profiles 1000
+"""
+import argparse
+from datetime import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from utils.apiResponseHandler import APIResponseHandler, orjson  # noqa: E402
+
+
+def legacy_success(data, message="Operation successful", status_code=200):
+    response = {"success": True, "message": message, "data": data, "timestamp": datetime.utcnow().isoformat()}
+    return JSONResponse(content=response, status_code=status_code)
+
+
+def legacy_error(message, status_code=400, error_details=None, error_code=None):
+    response = {
+        "success": False,
+        "message": message,
+        "error": {"code": error_code, "details": error_details or {}},
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    return JSONResponse(content=response, status_code=status_code)
+
+
+def recommendation(history_id: int, plans: int = 5):
+    return {
+        "user_history_id": history_id,
+        "recommended_plans": [
+            {
+                "plan_id": index + 1,
+                "plan_name": f"LIC's Jeevan Plan {index + 1}",
+                "plan_type": "endowment",
+                "sum_assured_range": "1,00,000 - 50,00,000",
+                "description": "Non-linked, participating endowment plan with savings and protection — ₹ benefits",
+                "match_score": round(0.93 - index * 0.071, 2),
+            }
+            for index in range(plans)
+        ],
+    }
+
+
+def same_json(left: bytes, right: bytes) -> bool:
+    left, right = json.loads(left), json.loads(right)
+    left.pop("timestamp"), right.pop("timestamp")
+    return left == right
+
+
+def timed(build, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        build().body
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--batch-profiles", type=int, default=1000)
+    args = parser.parse_args()
+
+    single = recommendation(1)
+    batch = {"results": [recommendation(index, plans=3) for index in range(args.batch_profiles)]}
+    cases = [
+        ("single recommendation",
+         lambda: legacy_success(single, "Recommendations generated", 201),
+         lambda: APIResponseHandler.success_response(single, "Recommendations generated", 201)),
+        (f"batch of {args.batch_profiles}",
+         lambda: legacy_success(batch, "Batch recommendations generated"),
+         lambda: APIResponseHandler.success_response(batch, "Batch recommendations generated")),
+        ("static error",
+         lambda: legacy_error("Invalid OTP", 400, error_code="invalid_otp"),
+         lambda: APIResponseHandler.error_response("Invalid OTP", 400, error_code="invalid_otp")),
+        ("error with details",
+         lambda: legacy_error("Validation failed", 422, {"validation_errors": [{"field": "age"}]}, "invalid_request"),
+         lambda: APIResponseHandler.error_response(
+             "Validation failed", 422, {"validation_errors": [{"field": "age"}]}, "invalid_request")),
+    ]
+
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json'}")
+    for name, legacy, fast in cases:
+        assert same_json(legacy().body, fast().body), name
+        iterations = max(10, args.iterations // 50) if name.startswith("batch") else args.iterations
+        legacy_us, fast_us = timed(legacy, iterations), timed(fast, iterations)
+        print(f"{name:<22} legacy {legacy_us:>10.1f} us   fast {fast_us:>10.1f} us   {legacy_us / fast_us:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Throughput of server.py as the number of preforked workers grows.
+
+For each --workers value a server is started on a free port against a temporary SQLite
+database, then --client-processes load generators (each --concurrency keep-alive
+connections) hit one endpoint for --duration seconds. Reports requests/s, p50/p99 latency
+and speedup over the first worker count. The load generators share the machine with the
+server, so leave cores for them: on N cores, scaling flattens out before N workers.
+
+    python benchmarks/bench_server_scaling.py --workers 1 2 4 8 --client-processes 4
+    python benchmarks/bench_server_scaling.py --path /users/1/history --duration 20
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(env: dict) -> None:
+    """One user with some history so the DB-backed endpoints have rows to return"""
+    script = (
+        "from utils.seeds_plans import init_seed_data\n"
+        "from utils.dbHelper import DBHelper\n"
+        "from utils.models import SessionLocal, User, UserHistory\n"
+        "init_seed_data()\n"
+        "with SessionLocal() as db:\n"
+        "    helper = DBHelper(db)\n"
+        "    [user_id] = helper.create_many(User, [{'name': 'Bench User', 'email': 'bench@example.com',\n"
+        "        'date_of_birth': 1, 'month_of_birth': 1, 'year_of_birth': 1990}])\n"
+        "    helper.create_many(UserHistory, ({'user_id': user_id, 'age': 30, 'annual_income': 500000,\n"
+        "        'no_of_dependent': 1, 'risk_capacity': 'MEDIUM'} for _ in range(100)))\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+
+
+def client(url: str, concurrency: int, duration: float, results) -> None:
+    async def run() -> None:
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=10) as session:
+            async def worker() -> None:
+                nonlocal errors
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        response = await session.get(url)
+                        if response.status_code >= 400:
+                            errors += 1
+                    except httpx.HTTPError:
+                        errors += 1
+                    latencies.append(time.perf_counter() - started)
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        results.put((latencies, errors))
+
+    asyncio.run(run())
+
+
+def wait_ready(base_url: str, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/heath_check", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def measure(workers: int, args, env: dict) -> dict:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port),
+         "--max-requests", "0"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_ready(base_url)
+        # Every worker has to have finished its own startup before timing starts
+        time.sleep(1 + 0.2 * workers)
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client, args=(base_url + args.path, args.concurrency, args.duration, results))
+            for _ in range(args.client_processes)
+        ]
+        for process in clients:
+            process.start()
+        latencies, errors = [], 0
+        for _ in clients:
+            client_latencies, client_errors = results.get()
+            latencies.extend(client_latencies)
+            errors += client_errors
+        for process in clients:
+            process.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=args.duration + 30)
+    latencies.sort()
+    return {
+        "workers": workers,
+        "rps": len(latencies) / args.duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/heath_check")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--client-processes", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per client process")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_server_")
+    env = {
+        **os.environ,
+        "DATABASE_URL": os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.sqlite3')}"),
+        "OTP_STORE_PATH": os.path.join(workdir, "otp.sqlite3"),
+        "RATE_LIMIT_PATH": os.path.join(workdir, "rate_limit.sqlite3"),
+        "DB_POOL_MIN": "0",
+    }
+    seed(env)
+
+    print(f"{os.cpu_count()} cores, GET {args.path}, {args.client_processes}x{args.concurrency} connections, "
+          f"{args.duration:.0f}s per run")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}{'speedup':>9}")
+    baseline = None
+    for workers in args.workers:
+        result = measure(workers, args, env)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>8}{result['rps']:>10.0f}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+              f"{result['errors']:>8}{result['rps'] / baseline:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
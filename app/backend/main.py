@@ -1,27 +1,47 @@
 # Standard library imports
 from datetime import datetime
 from enum import Enum
+import hmac
 import logging
-import re
+import os
 from typing import Optional, List
 
 # Third-party imports
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, Query, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, validator, EmailStr
-from sqlalchemy import inspect
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 import jwt
 
 # Local application imports
 from utils.apiResponseHandler import APIResponseHandler
-from utils.dbHelper import DBHelper
+from utils.dbHelper import AsyncDBHelper
+from utils.emailFilter import registered_emails
 from utils.emailHelper import EmailHelper
-from utils.models import init_db, engine, get_db, User, UserHistory, LICPlan
+from utils.exporter import EXPORT_FORMATS, RowEncoder, aiter_export, export_columns, export_statement
+from utils.historyWriter import HistoryWriteBuffer
+from utils.dbPool import warm_up
+from utils.metrics import MetricsMiddleware, MetricsRegistry
+from utils.models import get_async_engine, AsyncSessionLocal, get_async_db, sync_pool_monitor, async_pool_monitor, \
+    User, UserHistory
+from utils.pagination import decode_cursor, encode_cursor
+from utils.planCatalog import plan_catalog
+from utils.planRecommendations import recommend_from_table
+from utils.queryProfiler import QueryProfilerMiddleware, query_profiler
+from utils.rateLimiter import AdmissionController, Overloaded, RateLimiter, create_rate_limit_backend, \
+    retry_after_header
+from utils.recommendationCache import RecommendationCache
+from utils.recommender import recommend_batch
+from utils.replicaRouter import get_read_db, replica_router
 from utils.seeds_plans import init_seed_data
+from utils.userCache import user_identity_cache
+from utils.userImport import IMPORT_BATCH_SIZE, aimport_users, csv_stream_records
+from utils import validators
 
 # Initialize logging
 logger = logging.getLogger(__name__)
@@ -31,9 +51,29 @@ app = FastAPI()
 
 
 #on app startup we created init_seed_data function to create all the table and seeds 10 lic plans into the licplans table
+#(server.py runs it once in the master instead and turns it off for the workers)
+INIT_SEED_DATA_ON_STARTUP = os.getenv("INIT_SEED_DATA_ON_STARTUP", "true").lower() == "true"
+
 @app.on_event("startup")
 async def startup():
-    init_seed_data() 
+    if INIT_SEED_DATA_ON_STARTUP:
+        init_seed_data() 
+    await warm_up(get_async_engine(), int(os.getenv("DB_POOL_MIN", 2)))
+    await replica_router.start()
+    async with AsyncSessionLocal() as db:
+        await registered_emails.load(db)
+    await email_helper.start()
+    if HISTORY_WRITE_BEHIND:
+        await history_writer.start()
+
+
+#flush buffered history rows, drain queued OTP emails and close pooled SMTP and database connections before the worker exits
+@app.on_event("shutdown")
+async def shutdown():
+    await history_writer.stop()
+    await email_helper.stop()
+    await replica_router.stop()
+    await get_async_engine().dispose()
 
 origins = [
     "http://localhost:3000",#allowing the frontend to access the backend
@@ -47,11 +87,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+#per-request SQL statement counts and DB time (SQL_PROFILING=true), inside the metrics middleware
+app.add_middleware(QueryProfilerMiddleware, profiler=query_profiler)
+
+#per-route request metrics, registered last so it is the outermost middleware and times the whole request
+metrics_registry = MetricsRegistry()
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
 
 security = HTTPBearer()
 JWT_SECRET = "safeCheck"
 JWT_ALGORITHM = "HS256"
 
+#admin endpoints (/admin/*) require `Authorization: Bearer <ADMIN_API_TOKEN>`; they are disabled when no token is configured
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+async def require_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Dependency rejecting callers that don't present the admin token"""
+    if not ADMIN_API_TOKEN or not hmac.compare_digest(credentials.credentials.encode(), ADMIN_API_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
+        )
+
 #Helper function to get user_if from JWT token
 #this is not used for now .It can be used in production 
 async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)):
@@ -95,12 +153,17 @@ async def validation_exception_handler(request, exc):
 
 
 
-#api endpoint to fetch all the existing tables in db
+#prometheus scrape endpoint: request counts, status codes, latency histograms and in-flight gauges per route
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
+#api endpoint to fetch all the existing tables in db (read from a replica when one is configured)
 @app.get("/tables")
-async def get_all_tables(db: Session = Depends(get_db)):
+async def get_all_tables(db: AsyncSession = Depends(get_read_db)):
     try:
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
+        tables = await db.run_sync(lambda session: inspect(session.connection()).get_table_names())
         print(f"Tables in the database: {tables}")
         return tables
         
@@ -124,45 +187,190 @@ email_helper = EmailHelper()
 
 
 
+#api endpoint to inspect the OTP email delivery queue (depth, throughput, send latency)
+@app.get("/admin/email-queue", dependencies=[Depends(require_admin)])
+async def email_queue_stats():
+    return APIResponseHandler.success_response(
+        data=email_helper.delivery_queue.stats(),
+        message="Email queue stats"
+    )
+
+
+#api endpoint to reload the in-memory plan catalog after lic_plans was changed outside this worker
+@app.post("/admin/plan-catalog/reload", dependencies=[Depends(require_admin)])
+async def reload_plan_catalog(db: AsyncSession = Depends(get_async_db)):
+    await plan_catalog.load(db)
+    return APIResponseHandler.success_response(
+        data={"plans": len(plan_catalog.plans), "version": plan_catalog.version},
+        message="Plan catalog reloaded"
+    )
+
+
+#api endpoint to inspect the history write-behind buffer (flush sizes and latencies)
+@app.get("/admin/history-writer", dependencies=[Depends(require_admin)])
+async def history_writer_stats():
+    return APIResponseHandler.success_response(
+        data={"enabled": HISTORY_WRITE_BEHIND, **history_writer.stats()},
+        message="History write-behind stats"
+    )
+
+
+#api endpoint to inspect the recommendation cache hit rate
+@app.get("/admin/recommendation-cache", dependencies=[Depends(require_admin)])
+async def recommendation_cache_stats():
+    return APIResponseHandler.success_response(
+        data=recommendation_cache.stats(),
+        message="Recommendation cache stats"
+    )
+
+
+#api endpoint to inspect the email -> user identity cache used by the OTP routes
+@app.get("/admin/user-cache", dependencies=[Depends(require_admin)])
+async def user_cache_stats():
+    return APIResponseHandler.success_response(
+        data=user_identity_cache.stats(),
+        message="User identity cache stats"
+    )
+
+
+#api endpoint to inspect the registered-email Bloom filter (size, false positive rate, lookups it answered)
+@app.get("/admin/email-filter", dependencies=[Depends(require_admin)])
+async def email_filter_stats():
+    return APIResponseHandler.success_response(
+        data=registered_emails.stats(),
+        message="Registered email filter stats"
+    )
+
+
+#api endpoint to inspect SQL statements per route and the slow query log (SQL_PROFILING=true)
+@app.get("/admin/queries", dependencies=[Depends(require_admin)])
+async def query_stats():
+    return APIResponseHandler.success_response(
+        data=query_profiler.stats(),
+        message="Query profiler stats"
+    )
+
+
+#api endpoint to inspect database connection pools (checked-out, overflow, checkout wait histogram)
+@app.get("/admin/pool", dependencies=[Depends(require_admin)])
+async def pool_stats():
+    return APIResponseHandler.success_response(
+        data={"async": async_pool_monitor.stats(), "sync": sync_pool_monitor.stats()},
+        message="Connection pool stats"
+    )
+
+
+#api endpoint to inspect read replicas (health, replication lag, reads routed to each and to the primary)
+@app.get("/admin/replicas", dependencies=[Depends(require_admin)])
+async def replica_stats():
+    return APIResponseHandler.success_response(
+        data=replica_router.stats(),
+        message="Read replica stats"
+    )
+
+
+#per-email and per-client-IP token buckets plus a concurrency cap for /send-otp/, so one client can't exhaust the SMTP quota
+rate_limit_backend = create_rate_limit_backend()
+otp_email_limiter = RateLimiter(
+    "otp-email",
+    per_minute=float(os.getenv("OTP_RATE_EMAIL_PER_MINUTE", 1)),
+    burst=float(os.getenv("OTP_RATE_EMAIL_BURST", 3)),
+    backend=rate_limit_backend,
+)
+otp_ip_limiter = RateLimiter(
+    "otp-ip",
+    per_minute=float(os.getenv("OTP_RATE_IP_PER_MINUTE", 10)),
+    burst=float(os.getenv("OTP_RATE_IP_BURST", 20)),
+    backend=rate_limit_backend,
+)
+send_otp_admission = AdmissionController(
+    max_concurrent=int(os.getenv("SEND_OTP_MAX_CONCURRENCY", 100)),
+    max_wait=float(os.getenv("SEND_OTP_ADMISSION_WAIT_MS", 100)) / 1000,
+)
+TRUST_FORWARDED_FOR = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+def client_ip(http_request: Request) -> str:
+    """Client address for rate limiting; X-Forwarded-For is only honoured behind a trusted proxy"""
+    if TRUST_FORWARDED_FOR:
+        forwarded = http_request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return http_request.client.host if http_request.client else "unknown"
+
+def too_many_requests(message: str, retry_after: float, error_code: str):
+    return APIResponseHandler.error_response(
+        message=message,
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        error_code=error_code,
+        headers=retry_after_header(retry_after)
+    )
+
+
+#api endpoint to inspect the /send-otp/ rate limiters and admission control
+@app.get("/admin/rate-limits", dependencies=[Depends(require_admin)])
+async def rate_limit_stats():
+    return APIResponseHandler.success_response(
+        data={
+            "email": otp_email_limiter.stats(),
+            "ip": otp_ip_limiter.stats(),
+            "active_buckets": len(rate_limit_backend),
+            "send_otp_admission": send_otp_admission.stats(),
+        },
+        message="Rate limit stats"
+    )
+
+
 #api endpoint to send otp to user registered email
 class SendOTPRequest(BaseModel):
     email: str
 @app.post("/send-otp/", status_code=status.HTTP_200_OK)
-async def send_otp(request:SendOTPRequest, db: Session = Depends(get_db)):
+async def send_otp(request:SendOTPRequest, http_request: Request, db: AsyncSession = Depends(get_read_db)):
     logger.info(f"Request to send OTP: {request}")  
     """
     Send OTP to the provided email after checking if it exists in the database
     """
     try:
-        db_helper = DBHelper(db)
         logger.info(f"Request to send OTP: {request}")  
-        # Check if email exists in database
-        user = db_helper.get_by_field(User, "email", request.email)
-        if not user:
-            return APIResponseHandler.error_response(
-            message="Email not found in our system",
-            status_code=status.HTTP_404_NOT_FOUND,
-            error_code="Email not found in our system"
-        )
-
-        # Send OTP
-        success = email_helper.send_otp(request.email)
-        if not success:
-            return APIResponseHandler.error_response(
-            message="Failed to send OTP",
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            error_code="Internal Server Error"
-             )
+        # Rate limits are checked before the lookup so unknown emails are limited too
+        retry_after = await otp_ip_limiter.check(client_ip(http_request))
+        if retry_after:
+            return too_many_requests("Too many OTP requests from this address", retry_after, "rate_limited")
+        retry_after = await otp_email_limiter.check(request.email.strip().lower())
+        if retry_after:
+            return too_many_requests("Too many OTP requests for this email", retry_after, "rate_limited")
+
+        async with send_otp_admission.slot():
+            # Check if email exists in database (id and name only, usually from the identity cache)
+            user = await user_identity_cache.lookup(db, request.email)
+            if not user:
+                return APIResponseHandler.error_response(
+                message="Email not found in our system",
+                status_code=status.HTTP_404_NOT_FOUND,
+                error_code="Email not found in our system"
+            )
 
-        return APIResponseHandler.success_response(
-            data={
-                "email": request.email,
-                "user_id": user.id,
-                "name":user.name
-            },
-            message="OTP Sent Successfully"
-        )
+            # Queue OTP email for background delivery; a full queue is back-pressure, not a failure
+            success = await email_helper.queue_otp(request.email)
+            if not success:
+                if email_helper.delivery_queue.running:
+                    return too_many_requests("Server busy, please retry", send_otp_admission.retry_after, "overloaded")
+                return APIResponseHandler.error_response(
+                message="Failed to send OTP",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                error_code="Internal Server Error"
+                 )
+
+            return APIResponseHandler.success_response(
+                data={
+                    "email": request.email,
+                    "user_id": user.id,
+                    "name":user.name
+                },
+                message="OTP Sent Successfully"
+            )
 
+    except Overloaded as e:
+        return too_many_requests("Server busy, please retry", e.retry_after, "overloaded")
     except HTTPException:
         raise
     except Exception as e:
@@ -182,15 +390,14 @@ class VerifyOTPRequest(BaseModel):
     email: str
     otp: int
 @app.post("/verify-otp/", status_code=status.HTTP_200_OK)
-async def verify_otp(request:VerifyOTPRequest, db: Session = Depends(get_db)):
+async def verify_otp(request:VerifyOTPRequest, db: AsyncSession = Depends(get_read_db)):
     """
     Verify the provided OTP against the stored OTP for the email
     """
     try:
         # Verify OTP
 
-        db_helper = DBHelper(db)
-        user = db_helper.get_by_field(User, "email", request.email)
+        user = await user_identity_cache.lookup(db, request.email)
         if not user:
             return APIResponseHandler.error_response(
                 message="User not found",
@@ -199,7 +406,7 @@ async def verify_otp(request:VerifyOTPRequest, db: Session = Depends(get_db)):
             )
         
 
-        is_valid = email_helper.verify_otp(request.email, request.otp)
+        is_valid = await email_helper.verify_otp(request.email, request.otp)
         if not is_valid:
             return APIResponseHandler.error_response(
                 message="Invalid OTP or OTP expired",
@@ -246,31 +453,15 @@ class UserCreateRequest(BaseModel):
 
     @validator('name')
     def validate_name(cls, v):
-        v = v.strip()
-        if len(v) < 2:
-            raise ValueError('Name must be at least 2 characters')
-        if not re.match(r'^[a-zA-Z\s\-]+$', v):
-            raise ValueError('Name can only contain letters, spaces and hyphens')
-        return v
+        return validators.validate_name(v)
 
     @validator('dateOfBirth')
     def validate_date_of_birth(cls, v):
-        try:
-            birth_date = datetime.strptime(v, '%Y-%m-%d').date()
-        except ValueError:
-            raise ValueError('Invalid date format. Use YYYY-MM-DD')
-        
-        today = datetime.now().date()
-        if birth_date > today:
-            raise ValueError('Birth date cannot be in the future')
-        
-        age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-        if age < 18:
-            raise ValueError('User must be at least 18 years old')
-        
+        validators.parse_date_of_birth(v)
         return v
+
 @app.post("/signup/", status_code=status.HTTP_201_CREATED)
-def create_user(user_request: UserCreateRequest, db: Session = Depends(get_db)):
+async def create_user(user_request: UserCreateRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Create user from {name, email, dateOfBirth} format
     
@@ -282,11 +473,7 @@ def create_user(user_request: UserCreateRequest, db: Session = Depends(get_db)):
         }
     """
     try:
-        db_helper = DBHelper(db)
-        
-        # Check for existing email
-        if db_helper.get_by_field(User, "email", user_request.email):
-            raise ValueError("Email already registered")
+        db_helper = AsyncDBHelper(db)
 
         # Convert to database model format
         birth_date = datetime.strptime(user_request.dateOfBirth, '%Y-%m-%d')
@@ -300,8 +487,17 @@ def create_user(user_request: UserCreateRequest, db: Session = Depends(get_db)):
             "is_verified": False
         }
 
-        # Create user
-        created_user = db_helper.create(User, user_data)
+        # Create user; the duplicate email check is the ON CONFLICT clause of the same insert,
+        # so concurrent signups for one email can't race past it
+        created_user = await db_helper.create_if_absent(
+            User,
+            user_data,
+            conflict_fields=("email",),
+            returning=("id", "name", "email", "is_active", "created_ts")
+        )
+        if created_user is None:
+            raise ValueError("Email already registered")
+        registered_emails.add(created_user.email)
 
         # Prepare response
         response_data = {
@@ -313,10 +509,13 @@ def create_user(user_request: UserCreateRequest, db: Session = Depends(get_db)):
             "createdAt": created_user.created_ts.isoformat()
         }
 
-        return APIResponseHandler.success_response(
+        response = APIResponseHandler.success_response(
             data=response_data,
             message="User registered successfully"
         )
+        # The OTP routes read from replicas; keep this client on the primary until the new user has replicated
+        replica_router.pin_client(response)
+        return response
 
     except ValueError as e:
         return APIResponseHandler.error_response(
@@ -324,6 +523,14 @@ def create_user(user_request: UserCreateRequest, db: Session = Depends(get_db)):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             error_code="validation_error"
         )
+    except IntegrityError as e:
+        # The insert bypasses the ORM validators, so a value the request checks missed ends up at a table constraint
+        logger.warning(f"Signup rejected by a database constraint: {e.orig}")
+        return APIResponseHandler.error_response(
+            message="User data violates a database constraint",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            error_code="validation_error"
+        )
     except Exception as e:
         return APIResponseHandler.handle_exception(
             exc=e,
@@ -335,6 +542,22 @@ def create_user(user_request: UserCreateRequest, db: Session = Depends(get_db)):
 
 #api endpoint to save-user-history and recommend plans
 
+#opt-in group commit for history rows: requests share one multi-row insert per flush instead of a commit each
+HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "false").lower() == "true"
+history_writer = HistoryWriteBuffer(
+    AsyncSessionLocal,
+    max_batch=int(os.getenv("HISTORY_FLUSH_MAX_BATCH", 200)),
+    max_delay=float(os.getenv("HISTORY_FLUSH_MAX_DELAY_MS", 20)) / 1000,
+)
+
+#where save-user-history reads recommendations: "cache" scores the in-memory plan catalog (no query, but other
+#workers' plan changes show up after PLAN_CATALOG_TTL_SECONDS); "table" looks up the precomputed
+#plan_recommendations rows, current on every worker as soon as a plan change commits
+PLAN_RECOMMENDATIONS_SOURCE = os.getenv("PLAN_RECOMMENDATIONS_SOURCE", "cache").lower()
+
+#ranked recommendations per (age, risk_capacity, capped dependents), dropped whenever the plan catalog changes
+recommendation_cache = RecommendationCache(plan_catalog, maxsize=int(os.getenv("RECOMMENDATION_CACHE_SIZE", 4096)))
+
 class RiskCapacity(str, Enum):
     low = "low"
     medium = "medium"
@@ -350,7 +573,8 @@ class UserHistoryCreate(BaseModel):
 @app.post("/save-user-history/", status_code=status.HTTP_201_CREATED)
 async def save_user_history(
     history_data: UserHistoryCreate,
-    db: Session = Depends(get_db)
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Save user history data to database and recommend plans
@@ -365,7 +589,7 @@ async def save_user_history(
     }
     """
     try:
-        db_helper = DBHelper(db)
+        db_helper = AsyncDBHelper(db)
         
         # Validate age range
         if not 18 <= history_data.age <= 100:
@@ -384,49 +608,45 @@ async def save_user_history(
             "risk_capacity": history_data.risk_capacity
         }
         
-        # Save user history
-        created_history = db_helper.create(UserHistory, history_record)
+        # Save user history; in write-behind mode the row is committed with the next group flush
+        if history_writer.running:
+            created_history = await (await history_writer.submit(history_record))
+        else:
+            created_history = await db_helper.create(UserHistory, history_record)
         
-        # Query suitable plans based on user's profile
-        plans = db.query(LICPlan).filter(
-            LICPlan.min_age <= history_data.age,
-            LICPlan.max_age >= history_data.age,
-            LICPlan.risk_capacity.any(history_data.risk_capacity)
-        ).all()
-
-        if not plans:
+        # Ranked plans for the user's profile, from plan_recommendations or the in-memory plan catalog;
+        # plans are read-only here, so they come from a replica when one is usable, otherwise from the
+        # write session, so the request never holds two primary connections
+        replica_db = replica_router.replica_session(http_request)
+        if replica_db is not None:
+            # Release the primary connection (held since the refresh after create) before taking the replica's
+            await db.close()
+        read_db = replica_db if replica_db is not None else db
+        try:
+            if PLAN_RECOMMENDATIONS_SOURCE == "table":
+                recommended_plans = await recommend_from_table(
+                    read_db,
+                    history_data.age,
+                    history_data.risk_capacity,
+                    history_data.no_of_dependent
+                )
+            else:
+                await plan_catalog.ensure_loaded(read_db)
+                recommended_plans = recommendation_cache.get(
+                    history_data.age,
+                    history_data.risk_capacity,
+                    history_data.no_of_dependent
+                )
+        finally:
+            if replica_db is not None:
+                await replica_db.close()
+
+        if not recommended_plans:
             return APIResponseHandler.error_response(
                 message="No matching plans found",
                 status_code=status.HTTP_404_NOT_FOUND,
                 error_code="no_matching_plans"
             )
-
-        # Calculate match scores for each plan
-        recommended_plans = []
-        for plan in plans:
-            # Calculate age match score
-            age_match = 1 - abs((history_data.age - (plan.min_age + plan.max_age)/2)/100)
-            
-            # Calculate risk match score
-            risk_match = 1.0 if history_data.risk_capacity in plan.risk_capacity else 0.5
-            
-            # Calculate dependents factor
-            dependents_factor = min(history_data.no_of_dependent/5, 1)
-            
-            # Calculate overall score
-            score = (age_match * 0.4) + (risk_match * 0.4) + (dependents_factor * 0.2)
-            
-            recommended_plans.append({
-                "plan_id": plan.id,
-                "plan_name": plan.plan_name,
-                "plan_type": plan.plan_type.value,
-                "sum_assured_range": f"{plan.min_sum_assured:,} - {plan.max_sum_assured:,}",
-                "description": plan.description,
-                "match_score": round(score, 2)
-            })
-
-        # Sort plans by match score (highest first)
-        recommended_plans.sort(key=lambda x: x["match_score"], reverse=True)
         
         return APIResponseHandler.success_response(
             data={
@@ -452,3 +672,247 @@ async def save_user_history(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             error_code="database_error"
         )
+
+
+
+
+#api endpoint to read a user's saved history, newest first, one keyset page at a time
+HISTORY_PAGE_ORDER = ("created_ts", "id")
+HISTORY_CURSOR_TYPES = (datetime, int)
+
+@app.get("/users/{user_id}/history", status_code=status.HTTP_200_OK)
+async def get_user_history(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Page through a user's history. Pass `next_cursor` from the previous response as `cursor`
+    to get the next page; it is null on the last page.
+    """
+    try:
+        db_helper = AsyncDBHelper(db)
+        after = decode_cursor(cursor, HISTORY_CURSOR_TYPES) if cursor else None
+
+        # One extra row tells us whether another page follows
+        rows = await db_helper.get_keyset_page(
+            UserHistory, {"user_id": user_id}, HISTORY_PAGE_ORDER, after=after, limit=limit + 1
+        )
+        if not rows and after is None and not await db_helper.exists(User, {"id": user_id}):
+            return APIResponseHandler.error_response(
+                message="User not found",
+                status_code=status.HTTP_404_NOT_FOUND,
+                error_code="user_not_found"
+            )
+
+        page = rows[:limit]
+        next_cursor = encode_cursor([page[-1].created_ts, page[-1].id]) if len(rows) > limit else None
+        return APIResponseHandler.success_response(
+            data={
+                "items": [
+                    {
+                        "id": row.id,
+                        "age": row.age,
+                        "annual_income": row.annual_income,
+                        "no_of_dependent": row.no_of_dependent,
+                        "risk_capacity": row.risk_capacity.value,
+                        "created_at": row.created_ts.isoformat() if row.created_ts else None
+                    }
+                    for row in page
+                ],
+                "next_cursor": next_cursor
+            },
+            message="User history fetched successfully"
+        )
+
+    except ValueError as e:
+        return APIResponseHandler.error_response(
+            message=str(e),
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            error_code="invalid_cursor"
+        )
+    except Exception as e:
+        logger.error(f"Error fetching user history: {str(e)}", exc_info=True)
+        return APIResponseHandler.error_response(
+            message="Failed to fetch user history",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="database_error"
+        )
+
+
+
+
+#api endpoint to stream a whole table as NDJSON or CSV through a server-side cursor, in id order
+@app.get("/admin/export/{table}", dependencies=[Depends(require_admin)])
+async def export_table(
+    table: str,
+    request: Request,
+    format: str = Query("ndjson"),
+    after_id: Optional[int] = Query(None, ge=0),
+    batch_size: int = Query(1000, ge=1, le=10000)
+):
+    """
+    Every other query parameter is a filter, e.g.
+    /admin/export/user_history?format=csv&risk_capacity=high&created_from=2024-01-01
+
+    To resume an interrupted export, pass the id of the last row received as `after_id`.
+    """
+    filters = {
+        key: value for key, value in request.query_params.items()
+        if key not in ("format", "after_id", "batch_size")
+    }
+    try:
+        # Build the statement up front so bad tables or filters fail before the stream starts
+        export_statement(table, filters, after_id)
+        RowEncoder(export_columns(table), format)
+    except ValueError as e:
+        return APIResponseHandler.error_response(
+            message=str(e),
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            error_code="invalid_export"
+        )
+
+    async def chunks():
+        # Own session: the response body is produced after the request dependencies are closed
+        async with AsyncSessionLocal() as db:
+            async for chunk in aiter_export(db, table, format, filters, after_id, batch_size):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    )
+
+
+
+
+#api endpoint to bulk import users from a CSV request body (name,email,dateOfBirth) with the signup validation rules
+@app.post("/admin/import/users", status_code=status.HTTP_200_OK, dependencies=[Depends(require_admin)])
+async def import_users_csv(
+    request: Request,
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Send the file as the raw body, e.g.
+    curl --data-binary @partners.csv -H "Content-Type: text/csv" -H "Authorization: Bearer $ADMIN_API_TOKEN" \
+        /admin/import/users
+
+    The body is read and loaded as it streams in, one committed batch at a time; invalid
+    and already registered rows are skipped and listed in the per-row error report.
+    """
+    try:
+        report = await aimport_users(db, csv_stream_records(request.stream()), batch_size=batch_size)
+        return APIResponseHandler.success_response(
+            data=report.to_dict(),
+            message=f"Imported {report.imported} of {report.rows} users"
+        )
+
+    except ValueError as e:
+        return APIResponseHandler.error_response(
+            message=str(e),
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            error_code="invalid_import"
+        )
+    except Exception as e:
+        return APIResponseHandler.handle_exception(
+            exc=e,
+            context="user import"
+        )
+
+
+
+
+#api endpoint to re-score many profiles (or stored user histories) against all plans at once
+
+class RecommendationProfile(BaseModel):
+    age: int
+    no_of_dependent: int
+    risk_capacity: RiskCapacity
+    user_id: Optional[int] = None
+
+    @validator('age')
+    def validate_age(cls, v):
+        if not 18 <= v <= 100:
+            raise ValueError('Age must be between 18-100')
+        return v
+
+class BatchRecommendRequest(BaseModel):
+    profiles: List[RecommendationProfile] = []
+    history_ids: List[int] = []
+    top_k: int = 3
+
+    @validator('top_k')
+    def validate_top_k(cls, v):
+        if not 1 <= v <= 20:
+            raise ValueError('top_k must be between 1-20')
+        return v
+
+MAX_BATCH_PROFILES = 10000
+
+@app.post("/recommend/batch", status_code=status.HTTP_200_OK)
+async def recommend_batch_profiles(
+    batch_request: BatchRecommendRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Recommend the top_k plans for every profile in one pass
+    
+    Example Request:
+    {
+        "profiles": [{"age": 23, "no_of_dependent": 2, "risk_capacity": "medium"}],
+        "history_ids": [12, 13],
+        "top_k": 3
+    }
+    """
+    try:
+        if len(batch_request.profiles) + len(batch_request.history_ids) > MAX_BATCH_PROFILES:
+            return APIResponseHandler.error_response(
+                message=f"At most {MAX_BATCH_PROFILES} profiles per request",
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                error_code="batch_too_large"
+            )
+
+        profiles = [
+            (profile.user_id, None, profile.age, profile.risk_capacity, profile.no_of_dependent)
+            for profile in batch_request.profiles
+        ]
+        if batch_request.history_ids:
+            result = await db.execute(select(
+                UserHistory.user_id, UserHistory.id, UserHistory.age,
+                UserHistory.risk_capacity, UserHistory.no_of_dependent
+            ).filter(UserHistory.id.in_(batch_request.history_ids)))
+            profiles.extend(tuple(row) for row in result.all())
+
+        await plan_catalog.ensure_loaded(db)
+        recommendations = recommend_batch(
+            plan_catalog.plans,
+            [profile[2] for profile in profiles],
+            [profile[3] for profile in profiles],
+            [profile[4] for profile in profiles],
+            top_k=batch_request.top_k
+        )
+
+        return APIResponseHandler.success_response(
+            data={
+                "recommendations": [
+                    {
+                        "user_id": user_id,
+                        "history_id": history_id,
+                        "recommended_plans": recommendations.for_profile(index)
+                    }
+                    for index, (user_id, history_id, *_) in enumerate(profiles)
+                ]
+            },
+            message="Plan recommendations generated successfully"
+        )
+
+    except Exception as e:
+        logger.error(f"Error generating batch recommendations: {str(e)}", exc_info=True)
+        return APIResponseHandler.error_response(
+            message="Failed to generate recommendations",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="recommendation_error"
+        )
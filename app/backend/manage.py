@@ -0,0 +1,104 @@
+"""
+SafeCheck maintenance commands.
+
+    python manage.py export users --format csv --output users.csv
+    python manage.py export user_history --filter risk_capacity=high --filter created_from=2024-01-01
+    python manage.py export user_history --after-id 123456 >> history.ndjson   # resume
+    python manage.py import-users partners.csv --report errors.json
+    python manage.py rebuild-recommendations                                     # after SQL edits of lic_plans
+"""
+import argparse
+import json
+import sys
+
+from utils.exporter import EXPORT_FORMATS, EXPORTS, iter_export
+from utils.models import SessionLocal
+from utils.planRecommendations import MAX_AGE, MIN_AGE, rebuild_plan_recommendations
+from utils.userImport import IMPORT_BATCH_SIZE, IMPORT_MAX_REPORTED_ERRORS, csv_file_records, import_users
+
+
+def export(args) -> None:
+    filters = {}
+    for item in args.filter:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--filter expects key=value, got {item!r}")
+        filters[key] = value
+
+    output = open(args.output, "ab" if args.after_id else "wb") if args.output else sys.stdout.buffer
+    try:
+        with SessionLocal() as db:
+            chunks = iter_export(db, args.table, args.format, filters, args.after_id, args.batch_size)
+            # A resumed CSV export is appended to the earlier file, so don't repeat the header
+            header = next(chunks)
+            if not args.after_id:
+                output.write(header)
+            for chunk in chunks:
+                output.write(chunk)
+                output.flush()
+    except ValueError as e:
+        raise SystemExit(str(e))
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+
+def import_users_command(args) -> None:
+    try:
+        with open(args.file, newline="", encoding="utf-8-sig") as stream, SessionLocal() as db:
+            report = import_users(db, csv_file_records(stream), batch_size=args.batch_size,
+                                  max_errors=args.max_errors)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    result = report.to_dict()
+    print(f"rows {result['rows']}  imported {result['imported']}  duplicates {result['duplicates']}  "
+          f"invalid {result['invalid']}")
+    if args.report:
+        with open(args.report, "w") as output:
+            json.dump(result, output, indent=2)
+    else:
+        for error in result["errors"]:
+            print(f"line {error['line']}: {error['email']}: {'; '.join(error['errors'])}")
+
+
+def rebuild_recommendations(args) -> None:
+    with SessionLocal() as db:
+        rows = rebuild_plan_recommendations(db.connection(), args.min_age, args.max_age)
+        db.commit()
+    print(f"plan_recommendations: {rows} rows for ages {args.min_age}-{args.max_age}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="stream a table as NDJSON or CSV in id order")
+    export_parser.add_argument("table", choices=sorted(EXPORTS))
+    export_parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    export_parser.add_argument("--output", help="file to write (appended to when resuming); stdout by default")
+    export_parser.add_argument("--after-id", type=int, help="resume after the id of the last exported row")
+    export_parser.add_argument("--filter", action="append", default=[], metavar="KEY=VALUE")
+    export_parser.add_argument("--batch-size", type=int, default=1000)
+    export_parser.set_defaults(handler=export)
+
+    import_parser = commands.add_parser("import-users", help="bulk import users from a name,email,dateOfBirth CSV")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    import_parser.add_argument("--max-errors", type=int, default=IMPORT_MAX_REPORTED_ERRORS,
+                               help="failed rows to list in the report")
+    import_parser.add_argument("--report", help="write the JSON report here instead of printing the errors")
+    import_parser.set_defaults(handler=import_users_command)
+
+    rebuild_parser = commands.add_parser("rebuild-recommendations",
+                                         help="recompute plan_recommendations from the active lic_plans")
+    rebuild_parser.add_argument("--min-age", type=int, default=MIN_AGE)
+    rebuild_parser.add_argument("--max-age", type=int, default=MAX_AGE)
+    rebuild_parser.set_defaults(handler=rebuild_recommendations)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
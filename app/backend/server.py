@@ -0,0 +1,91 @@
+"""
+Production entry point: preforked uvicorn workers behind one listening socket.
+
+The master runs the one-off startup work (schema creation and seeding) before forking, so
+workers skip it; it then supervises the workers, replacing any that exit, including those
+recycled after MAX_REQUESTS requests. On SIGTERM each worker stops accepting connections and
+finishes in-flight requests (and its shutdown handlers) within GRACEFUL_TIMEOUT seconds.
+uvloop and httptools are used when installed.
+
+    python server.py                                # WEB_CONCURRENCY workers, default one per core
+    python server.py --workers 4 --port 8000
+    python server.py --reload                       # development: one process, restarts on changes
+"""
+import argparse
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+logger = logging.getLogger("server")
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def prepare_workers(workers: int) -> None:
+    """One-off startup work in the master; the environment is inherited by the spawned workers"""
+    from utils.models import get_engine
+    from utils.seeds_plans import init_seed_data
+
+    init_seed_data()
+    # Workers are spawned, not forked, but don't keep master connections open for their lifetime
+    get_engine().dispose()
+    os.environ["INIT_SEED_DATA_ON_STARTUP"] = "false"
+
+    if workers > 1:
+        # Per-process OTP codes and rate-limit buckets break when requests land on different
+        # workers; share them through the host unless a backend was chosen explicitly
+        os.environ.setdefault("OTP_STORE", "sqlite")
+        os.environ.setdefault("RATE_LIMIT_BACKEND", "sqlite")
+        for name in ("OTP_STORE", "RATE_LIMIT_BACKEND"):
+            if os.environ[name] == "memory":
+                logger.warning(f"{name}=memory with {workers} workers: each worker keeps its own state")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=env_int("PORT", 8000))
+    parser.add_argument("--workers", type=int, default=env_int("WEB_CONCURRENCY", os.cpu_count() or 1))
+    parser.add_argument("--max-requests", type=int, default=env_int("MAX_REQUESTS", 10000),
+                        help="recycle a worker after this many requests (0 disables)")
+    parser.add_argument("--max-requests-jitter", type=int, default=env_int("MAX_REQUESTS_JITTER", 1000),
+                        help="random extra requests per worker so they don't all restart together")
+    parser.add_argument("--graceful-timeout", type=int, default=env_int("GRACEFUL_TIMEOUT", 30))
+    parser.add_argument("--keep-alive", type=int, default=env_int("KEEP_ALIVE", 5))
+    parser.add_argument("--backlog", type=int, default=env_int("BACKLOG", 2048))
+    parser.add_argument("--reload", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+    if args.reload:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True, loop=loop, http=http)
+        return
+
+    prepare_workers(args.workers)
+    logger.info(f"Starting {args.workers} workers on {args.host}:{args.port} (loop={loop}, http={http})")
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        limit_max_requests=args.max_requests or None,
+        limit_max_requests_jitter=args.max_requests_jitter if args.max_requests else 0,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        proxy_headers=True,
+        access_log=os.getenv("ACCESS_LOG", "false").lower() == "true",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,59 @@
 # response_handler.py
 from fastapi import status
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+from functools import lru_cache
 from typing import Any, Dict, Optional
+import json
 import logging
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder produces the same JSON
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+
+def _stdlib_dumps(value: Any) -> bytes:
+    # Same settings as starlette's JSONResponse.render
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        """Serialize to compact UTF-8 JSON with orjson, falling back to the stdlib for values it rejects"""
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers wider than 64 bits or unsupported subclasses
+            return _stdlib_dumps(value)
+else:
+    dumps = _stdlib_dumps
+
+
+def _timestamp() -> bytes:
+    return datetime.utcnow().isoformat().encode("ascii")
+
+
+@lru_cache(maxsize=256)
+def _success_prefix(message: str) -> bytes:
+    return b'{"success":true,"message":' + dumps(message) + b',"data":'
+
+
+@lru_cache(maxsize=256)
+def _static_error_prefix(message: str, error_code: Optional[str]) -> bytes:
+    return (
+        b'{"success":false,"message":' + dumps(message)
+        + b',"error":{"code":' + dumps(error_code) + b',"details":{}},"timestamp":"'
+    )
+
+
+class PreSerializedJSONResponse(Response):
+    """JSON response whose body is already encoded; render() passes the bytes through"""
+    media_type = "application/json"
+
+
 class APIResponseHandler:
     """
     A standardized response handler for API operations
@@ -16,46 +63,44 @@ class APIResponseHandler:
     - data: response payload (if successful)
     - error: error details (if failed)
     - timestamp: time of response
+
+    Envelopes are written straight to bytes: the payload is serialized on its own and
+    spliced between cached envelope fragments, so no wrapper dict is built per response.
     """
-    
+
     @staticmethod
     def success_response(
         data: Any = None,
         message: str = "Operation successful",
         status_code: int = status.HTTP_200_OK,
-    ) -> JSONResponse:
-        response = {
-            "success": True,
-            "message": message,
-            "data": data,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-            
-        return JSONResponse(
-            content=response,
-            status_code=status_code
-        )
+    ) -> Response:
+        body = _success_prefix(message) + dumps(data) + b',"timestamp":"' + _timestamp() + b'"}'
+        return PreSerializedJSONResponse(content=body, status_code=status_code)
 
     @staticmethod
     def error_response(
         message: str,
         status_code: int = status.HTTP_400_BAD_REQUEST,
         error_details: Optional[Dict] = None,
-        error_code: Optional[str] = None
-    ) -> JSONResponse:
-        response = {
-            "success": False,
-            "message": message,
-            "error": {
-                "code": error_code,
-                "details": error_details or {}
-            },
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        return JSONResponse(
-            content=response,
-            status_code=status_code
-        )
+        error_code: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        if error_details:
+            body = (
+                b'{"success":false,"message":' + dumps(message)
+                + b',"error":' + dumps({"code": error_code, "details": error_details})
+                + b',"timestamp":"' + _timestamp() + b'"}'
+            )
+        else:
+            body = _static_error_prefix(message, error_code) + _timestamp() + b'"}'
+        return PreSerializedJSONResponse(content=body, status_code=status_code, headers=headers)
 
-   
\ No newline at end of file
+    @staticmethod
+    def handle_exception(exc: Exception, context: str = "request") -> Response:
+        """Log an unexpected error and return a generic 500 without leaking its details"""
+        logger.error(f"Unexpected error during {context}: {exc}", exc_info=exc)
+        return APIResponseHandler.error_response(
+            message=f"Unexpected error during {context}",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="internal_error"
+        )
@@ -1,17 +1,37 @@
 # dbHelper.py
-from typing import Type, TypeVar, Any, Dict, List, Optional
-from sqlalchemy import inspect, and_
+from enum import Enum
+import io
+from typing import Type, TypeVar, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+from sqlalchemy import and_, column as column_clause, insert, literal, select, table as table_clause, text, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
 import logging
 
 T = TypeVar('T')  # Generic type for SQLAlchemy models
 
-class DBHelper:
-    def __init__(self, db: Session):
+# Callbacks run with the ids of changed records after a helper commits an insert, update, delete or upsert
+_change_listeners: Dict[type, List[Callable[[Sequence[Any]], None]]] = {}
+
+class BaseDBHelper:
+    """Input checks shared by the sync and async helpers"""
+    def __init__(self, db):
         self.db = db
         self.logger = logging.getLogger(__name__)
 
+    @staticmethod
+    def add_change_listener(model: Type[T], callback: Callable[[Sequence[Any]], None]) -> None:
+        """Call `callback(ids)` whenever a helper commits inserts, updates, deletes or upserts of `model` records"""
+        _change_listeners.setdefault(model, []).append(callback)
+
+    def _notify_changed(self, model: Type[T], ids: Sequence[Any]) -> None:
+        for callback in _change_listeners.get(model, ()):
+            try:
+                callback(ids)
+            except Exception as e:
+                # The write is already committed; a failing listener must not turn it into an error
+                self.logger.error(f"Change listener for {model.__name__} failed: {e}")
+
     def _sanitize_input(self, data: Any) -> Any:
         """Basic input sanitization to prevent SQL injection"""
         if isinstance(data, str):
@@ -27,6 +47,124 @@ class DBHelper:
         if not hasattr(model, '__table__'):
             raise ValueError(f"{model.__name__} is not a SQLAlchemy model")
 
+    def _prepare_rows(self, model: Type[T], rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Sanitize bulk rows and fill in Python-side column defaults, which Core inserts
+        (unlike ORM instances) would otherwise leave to the database.
+        ORM @validates hooks are not run; the table CHECK constraints still apply.
+        """
+        defaults = {
+            column.key: column.default.arg
+            for column in model.__table__.columns
+            if column.default is not None and column.default.is_scalar
+        }
+        for row in rows:
+            unknown = set(row) - set(model.__table__.columns.keys())
+            if unknown:
+                raise ValueError(f"Unknown {model.__name__} fields: {', '.join(sorted(unknown))}")
+            yield {**defaults, **self._sanitize_input(row)}
+
+    @staticmethod
+    def _chunks(rows: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _inserted_ids(created: List[Any], returning: Optional[Sequence[str]]) -> List[Any]:
+        """Record ids from a create_many result; empty when `returning` leaves out id"""
+        if not returning:
+            return created
+        if "id" not in returning:
+            return []
+        index = list(returning).index("id")
+        return [row[index] for row in created]
+
+    @staticmethod
+    def _bulk_insert_statement(model: Type[T], returning: Optional[Sequence[str]]):
+        columns = [getattr(model, column) for column in returning] if returning else [model.id]
+        return insert(model).returning(*columns, sort_by_parameter_order=True)
+
+    def _dialect_insert(self, model: Type[T]):
+        """INSERT construct for the session's dialect, needed for ON CONFLICT support"""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(model)
+        if dialect == "sqlite":
+            return sqlite.insert(model)
+        raise ValueError(f"Upserts are not supported on {dialect}")
+
+    def _upsert_statement(self, model: Type[T], chunk: List[Dict[str, Any]], conflict_fields: Sequence[str],
+                          update_fields: Optional[Sequence[str]]):
+        # Rows are bound as executemany parameters (batched into multi-row VALUES by the
+        # driver layer), so the compiled statement is cached rather than rebuilt per chunk
+        stmt = self._dialect_insert(model)
+        if update_fields is None:
+            update_fields = [key for key in chunk[0] if key not in conflict_fields]
+        if update_fields:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(conflict_fields),
+                set_={field: stmt.excluded[field] for field in update_fields}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_fields))
+        return stmt.returning(model.id, *[getattr(model, field) for field in conflict_fields])
+
+    def _insert_ignore_statement(self, model: Type[T], row: Dict[str, Any], conflict_fields: Sequence[str],
+                                 returning: Optional[Sequence[str]]):
+        columns = [getattr(model, column) for column in returning] if returning else [model.id]
+        return (
+            self._dialect_insert(model).values(row)
+            .on_conflict_do_nothing(index_elements=list(conflict_fields))
+            .returning(*columns)
+        )
+
+    def _conditions(self, model: Type[T], filters: Optional[Dict[str, Any]]) -> List[Any]:
+        sanitized_filters = self._sanitize_input(filters or {})
+        return [getattr(model, k) == v for k, v in sanitized_filters.items()]
+
+    def _projection_statement(self, model: Type[T], columns: Sequence[str], filters: Optional[Dict[str, Any]],
+                              limit: Optional[int] = None):
+        """SELECT of just `columns`; results are Row tuples, never ORM instances or identity-map entries"""
+        query = select(*[getattr(model, column) for column in columns]).filter(*self._conditions(model, filters))
+        return query.limit(limit) if limit is not None else query
+
+    def _exists_statement(self, model: Type[T], filters: Optional[Dict[str, Any]]):
+        return select(select(literal(1)).select_from(model).filter(*self._conditions(model, filters)).exists())
+
+    def _keyset_statement(self, model: Type[T], filters: Optional[Dict[str, Any]], order_fields: Sequence[str],
+                          after: Optional[Sequence[Any]], limit: int, descending: bool):
+        columns = [getattr(model, field) for field in order_fields]
+        query = select(model).filter(*self._conditions(model, filters))
+        if after is not None:
+            if len(after) != len(columns):
+                raise ValueError(f"Page position needs {len(columns)} values ({', '.join(order_fields)})")
+            position = tuple_(*columns)
+            boundary = tuple_(*[literal(value, column.type) for column, value in zip(columns, after)])
+            query = query.filter(position < boundary if descending else position > boundary)
+        return query.order_by(*[column.desc() if descending else column.asc() for column in columns]).limit(limit)
+
+    @staticmethod
+    def _dedupe_on(chunk: List[Dict[str, Any]], conflict_fields: Sequence[str]) -> List[Dict[str, Any]]:
+        """Keep the last row per conflict key; one statement may not update a row twice"""
+        return list({tuple(row[field] for field in conflict_fields): row for row in chunk}.values())
+
+    @staticmethod
+    def _upserted_key(row, conflict_fields: Sequence[str]):
+        return row[1] if len(conflict_fields) == 1 else tuple(row[1:])
+
+
+class DBHelper(BaseDBHelper):
+    def __init__(self, db: Session):
+        super().__init__(db)
+
     def create(self, model: Type[T], data: Dict[str, Any]) -> T:
         """Create a new record"""
         try:
@@ -45,6 +183,145 @@ class DBHelper:
             self.logger.error(f"Error creating {model.__name__}: {e}")
             raise
 
+    def create_many(self, model: Type[T], rows: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                    method: str = "values", returning: Optional[Sequence[str]] = None) -> List[Any]:
+        """
+        Insert many records in one transaction and return their generated ids in input order
+        
+        Args:
+            rows: dicts with the same keys
+            chunk_size: rows per INSERT statement (or per COPY batch)
+            method: "values" for multi-row INSERT ... RETURNING, "copy" for Postgres COPY
+                    through a temporary table (fastest for large imports, psycopg2 only)
+            returning: columns to return per record as row tuples instead of bare ids ("values" only)
+        """
+        try:
+            self._validate_model(model)
+            ids = []
+            for chunk in self._chunks(self._prepare_rows(model, rows), chunk_size):
+                if method == "copy":
+                    if returning:
+                        raise ValueError("returning is only supported with method='values'")
+                    ids.extend(self._copy_chunk(model, chunk))
+                elif method == "values":
+                    result = self.db.execute(self._bulk_insert_statement(model, returning), chunk)
+                    ids.extend(result.all() if returning else result.scalars().all())
+                else:
+                    raise ValueError(f"Unknown bulk insert method: {method}")
+            self.db.commit()
+            self._notify_changed(model, self._inserted_ids(ids, returning))
+            self.logger.info(f"Created {len(ids)} {model.__name__} records")
+            return ids
+            
+        except Exception as e:
+            self.db.rollback()
+            self.logger.error(f"Error bulk creating {model.__name__}: {e}")
+            raise
+
+    def _copy_chunk(self, model: Type[T], chunk: List[Dict[str, Any]]) -> List[int]:
+        """COPY a chunk into a temporary table, then move it with one INSERT ... SELECT ... RETURNING"""
+        if self.db.get_bind().dialect.name != "postgresql":
+            raise ValueError("COPY is only available on PostgreSQL")
+        table = model.__table__.name
+        columns = list(chunk[0])
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        buffer = io.StringIO()
+        for index, row in enumerate(chunk):
+            values = [row[column] for column in columns]
+            if any(isinstance(value, (list, tuple, dict)) for value in values):
+                raise ValueError("COPY only supports scalar columns, use method='values'")
+            buffer.write(",".join([str(index)] + [self._copy_field(value) for value in values]) + "\n")
+        buffer.seek(0)
+
+        self.db.execute(text(
+            f'CREATE TEMP TABLE IF NOT EXISTS "_bulk_{table}" ON COMMIT DROP AS '
+            f'SELECT 0::integer AS _seq, {column_list} FROM "{table}" WITH NO DATA'
+        ))
+        self.db.execute(text(f'TRUNCATE "_bulk_{table}"'))
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY \"_bulk_{table}\" (_seq, {column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+        finally:
+            cursor.close()
+        # A Core INSERT rather than text, so session hooks see which table was written
+        staged = table_clause(f"_bulk_{table}", column_clause("_seq"), *[column_clause(column) for column in columns])
+        result = self.db.execute(
+            insert(model)
+            .from_select(columns, select(*[staged.c[column] for column in columns]).order_by(staged.c._seq))
+            .returning(model.id)
+        )
+        # Ids come from the table sequence in _seq order, so ascending ids follow input order
+        return sorted(result.scalars().all())
+
+    @staticmethod
+    def _copy_field(value: Any) -> str:
+        """
+        One COPY CSV field. NULL is an unquoted \\N (the COPY's NULL marker) and text is always
+        quoted, so empty strings stay '' and a literal \\N stays text rather than becoming NULL.
+        """
+        if value is None:
+            return "\\N"
+        if isinstance(value, Enum):
+            value = value.value
+        if isinstance(value, (int, float)):
+            return str(value)
+        return '"' + str(value).replace('"', '""') + '"'
+
+    def create_if_absent(self, model: Type[T], data: Dict[str, Any], conflict_fields: Sequence[str],
+                         returning: Optional[Sequence[str]] = None) -> Optional[Any]:
+        """
+        Insert a record unless one with the same `conflict_fields` exists, in a single
+        INSERT ... ON CONFLICT DO NOTHING RETURNING statement. Safe against concurrent
+        inserts of the same key: exactly one caller gets the row.
+        
+        Returns:
+            the new row (id, or the `returning` columns) or None if the key already exists
+        """
+        try:
+            self._validate_model(model)
+            row = next(self._prepare_rows(model, [data]))
+            created = self.db.execute(self._insert_ignore_statement(model, row, conflict_fields, returning)).first()
+            self.db.commit()
+            if created is not None:
+                self.logger.info(f"Created {model.__name__} with ID: {created[0]}")
+            return created if returning else (created[0] if created else None)
+            
+        except Exception as e:
+            self.db.rollback()
+            self.logger.error(f"Error creating {model.__name__}: {e}")
+            raise
+
+    def upsert_many(self, model: Type[T], rows: Iterable[Dict[str, Any]], conflict_fields: Sequence[str],
+                    update_fields: Optional[Sequence[str]] = None, chunk_size: int = 1000) -> Dict[Any, int]:
+        """
+        Insert or update many records on a unique key in one transaction
+        
+        Args:
+            conflict_fields: columns of the unique constraint to upsert on, e.g. ["email"]
+            update_fields: columns to overwrite on conflict; defaults to every other given column,
+                           an empty list leaves existing rows untouched
+        
+        Returns:
+            Dict mapping each conflict key (a tuple for composite keys) to the record id;
+            with update_fields=[] existing rows are not returned
+        """
+        try:
+            self._validate_model(model)
+            ids = {}
+            for chunk in self._chunks(self._prepare_rows(model, rows), chunk_size):
+                chunk = self._dedupe_on(chunk, conflict_fields)
+                result = self.db.execute(self._upsert_statement(model, chunk, conflict_fields, update_fields), chunk)
+                ids.update((self._upserted_key(row, conflict_fields), row[0]) for row in result.all())
+            self.db.commit()
+            self._notify_changed(model, list(ids.values()))
+            self.logger.info(f"Upserted {len(ids)} {model.__name__} records")
+            return ids
+            
+        except Exception as e:
+            self.db.rollback()
+            self.logger.error(f"Error bulk upserting {model.__name__}: {e}")
+            raise
+
     def get(self, model: Type[T], record_id: Any) -> Optional[T]:
         """Get a single record by ID"""
         try:
@@ -70,6 +347,23 @@ class DBHelper:
             self.logger.error(f"Error getting all {model.__name__}: {e}")
             raise
 
+    def get_keyset_page(self, model: Type[T], filters: Optional[Dict[str, Any]], order_fields: Sequence[str],
+                        after: Optional[Sequence[Any]] = None, limit: int = 20, descending: bool = True) -> List[T]:
+        """
+        Get one page of records ordered by `order_fields`, starting after the position `after`
+        (the order_fields values of the last record of the previous page). The position is
+        compared as a row value, so with an index on (filter fields, *order_fields) every page
+        costs the same no matter how deep it is, unlike OFFSET.
+        """
+        try:
+            self._validate_model(model)
+            return list(self.db.execute(
+                self._keyset_statement(model, filters, order_fields, after, limit, descending)
+            ).scalars().all())
+        except Exception as e:
+            self.logger.error(f"Error getting page of {model.__name__}: {e}")
+            raise
+
     def update(self, model: Type[T], record_id: Any, update_data: Dict[str, Any]) -> Optional[T]:
         """Update a record"""
         try:
@@ -84,6 +378,7 @@ class DBHelper:
                 setattr(instance, key, value)
                 
             self.db.commit()
+            self._notify_changed(model, [record_id])
             self.db.refresh(instance)
             self.logger.info(f"Updated {model.__name__} with ID: {record_id}")
             return instance
@@ -103,6 +398,7 @@ class DBHelper:
                 
             self.db.delete(instance)
             self.db.commit()
+            self._notify_changed(model, [record_id])
             self.logger.info(f"Deleted {model.__name__} with ID: {record_id}")
             return True
             
@@ -119,4 +415,265 @@ class DBHelper:
             return self.db.query(model).filter(getattr(model, field) == sanitized_value).first()
         except Exception as e:
             self.logger.error(f"Error getting {model.__name__} by {field}={value}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def get_columns(self, model: Type[T], columns: Sequence[str], filters: Optional[Dict[str, Any]] = None,
+                    limit: Optional[int] = None) -> List[Any]:
+        """
+        Get only `columns` of the records matching `filters`, as Row tuples (attribute access
+        by column name). No ORM instance is built or added to the identity map, so this is the
+        cheap path for reads that don't modify the records.
+        """
+        try:
+            self._validate_model(model)
+            return list(self.db.execute(self._projection_statement(model, columns, filters, limit)).all())
+        except Exception as e:
+            self.logger.error(f"Error getting {', '.join(columns)} of {model.__name__}: {e}")
+            raise
+
+    def get_columns_by_field(self, model: Type[T], field: str, value: Any, columns: Sequence[str]) -> Optional[Any]:
+        """Get only `columns` of the first record matching a field, as a Row tuple (no ORM instance)"""
+        try:
+            self._validate_model(model)
+            return self.db.execute(self._projection_statement(model, columns, {field: value}, limit=1)).first()
+        except Exception as e:
+            self.logger.error(f"Error getting {model.__name__} by {field}={value}: {e}")
+            raise
+
+    def get_scalar_by_field(self, model: Type[T], field: str, value: Any, column: str) -> Optional[Any]:
+        """Get one column of the first record matching a field, or None if there is none"""
+        try:
+            self._validate_model(model)
+            return self.db.execute(self._projection_statement(model, (column,), {field: value}, limit=1)).scalar()
+        except Exception as e:
+            self.logger.error(f"Error getting {model.__name__}.{column} by {field}={value}: {e}")
+            raise
+
+    def exists(self, model: Type[T], filters: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether any record matches `filters`, as one SELECT EXISTS that stops at the first match"""
+        try:
+            self._validate_model(model)
+            return bool(self.db.execute(self._exists_statement(model, filters)).scalar())
+        except Exception as e:
+            self.logger.error(f"Error checking for {model.__name__} matching {filters}: {e}")
+            raise
+
+
+class AsyncDBHelper(BaseDBHelper):
+    """Same API as DBHelper for an AsyncSession; every method is a coroutine"""
+    def __init__(self, db: AsyncSession):
+        super().__init__(db)
+
+    async def create(self, model: Type[T], data: Dict[str, Any]) -> T:
+        """Create a new record"""
+        try:
+            self._validate_model(model)
+            sanitized_data = self._sanitize_input(data)
+            
+            instance = model(**sanitized_data)
+            self.db.add(instance)
+            await self.db.commit()
+            await self.db.refresh(instance)
+            self.logger.info(f"Created {model.__name__} with ID: {instance.id}")
+            return instance
+            
+        except Exception as e:
+            await self.db.rollback()
+            self.logger.error(f"Error creating {model.__name__}: {e}")
+            raise
+
+    async def create_many(self, model: Type[T], rows: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                          returning: Optional[Sequence[str]] = None) -> List[Any]:
+        """Insert many records in one transaction and return their generated ids (or `returning` rows) in input order"""
+        try:
+            self._validate_model(model)
+            ids = []
+            for chunk in self._chunks(self._prepare_rows(model, rows), chunk_size):
+                result = await self.db.execute(self._bulk_insert_statement(model, returning), chunk)
+                ids.extend(result.all() if returning else result.scalars().all())
+            await self.db.commit()
+            self._notify_changed(model, self._inserted_ids(ids, returning))
+            self.logger.info(f"Created {len(ids)} {model.__name__} records")
+            return ids
+            
+        except Exception as e:
+            await self.db.rollback()
+            self.logger.error(f"Error bulk creating {model.__name__}: {e}")
+            raise
+
+    async def create_if_absent(self, model: Type[T], data: Dict[str, Any], conflict_fields: Sequence[str],
+                               returning: Optional[Sequence[str]] = None) -> Optional[Any]:
+        """Insert a record unless its `conflict_fields` already exist, see DBHelper.create_if_absent"""
+        try:
+            self._validate_model(model)
+            row = next(self._prepare_rows(model, [data]))
+            result = await self.db.execute(self._insert_ignore_statement(model, row, conflict_fields, returning))
+            created = result.first()
+            await self.db.commit()
+            if created is not None:
+                self.logger.info(f"Created {model.__name__} with ID: {created[0]}")
+            return created if returning else (created[0] if created else None)
+            
+        except Exception as e:
+            await self.db.rollback()
+            self.logger.error(f"Error creating {model.__name__}: {e}")
+            raise
+
+    async def upsert_many(self, model: Type[T], rows: Iterable[Dict[str, Any]], conflict_fields: Sequence[str],
+                          update_fields: Optional[Sequence[str]] = None, chunk_size: int = 1000) -> Dict[Any, int]:
+        """Insert or update many records on a unique key in one transaction, see DBHelper.upsert_many"""
+        try:
+            self._validate_model(model)
+            ids = {}
+            for chunk in self._chunks(self._prepare_rows(model, rows), chunk_size):
+                chunk = self._dedupe_on(chunk, conflict_fields)
+                result = await self.db.execute(
+                    self._upsert_statement(model, chunk, conflict_fields, update_fields), chunk
+                )
+                ids.update((self._upserted_key(row, conflict_fields), row[0]) for row in result.all())
+            await self.db.commit()
+            self._notify_changed(model, list(ids.values()))
+            self.logger.info(f"Upserted {len(ids)} {model.__name__} records")
+            return ids
+            
+        except Exception as e:
+            await self.db.rollback()
+            self.logger.error(f"Error bulk upserting {model.__name__}: {e}")
+            raise
+
+    async def get(self, model: Type[T], record_id: Any) -> Optional[T]:
+        """Get a single record by ID"""
+        try:
+            self._validate_model(model)
+            result = await self.db.execute(select(model).filter(model.id == record_id))
+            return result.scalars().first()
+        except Exception as e:
+            self.logger.error(f"Error getting {model.__name__} with ID {record_id}: {e}")
+            raise
+
+    async def get_all(self, model: Type[T], filters: Optional[Dict[str, Any]] = None) -> List[T]:
+        """Get all records with optional filters"""
+        try:
+            self._validate_model(model)
+            query = select(model)
+            
+            if filters:
+                sanitized_filters = self._sanitize_input(filters)
+                conditions = [getattr(model, k) == v for k, v in sanitized_filters.items()]
+                query = query.filter(and_(*conditions))
+                
+            result = await self.db.execute(query)
+            return list(result.scalars().all())
+        except Exception as e:
+            self.logger.error(f"Error getting all {model.__name__}: {e}")
+            raise
+
+    async def get_keyset_page(self, model: Type[T], filters: Optional[Dict[str, Any]], order_fields: Sequence[str],
+                              after: Optional[Sequence[Any]] = None, limit: int = 20,
+                              descending: bool = True) -> List[T]:
+        """Get one page of records after a keyset position, see DBHelper.get_keyset_page"""
+        try:
+            self._validate_model(model)
+            result = await self.db.execute(
+                self._keyset_statement(model, filters, order_fields, after, limit, descending)
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            self.logger.error(f"Error getting page of {model.__name__}: {e}")
+            raise
+
+    async def update(self, model: Type[T], record_id: Any, update_data: Dict[str, Any]) -> Optional[T]:
+        """Update a record"""
+        try:
+            self._validate_model(model)
+            sanitized_data = self._sanitize_input(update_data)
+            
+            result = await self.db.execute(select(model).filter(model.id == record_id))
+            instance = result.scalars().first()
+            if not instance:
+                return None
+                
+            for key, value in sanitized_data.items():
+                setattr(instance, key, value)
+                
+            await self.db.commit()
+            self._notify_changed(model, [record_id])
+            await self.db.refresh(instance)
+            self.logger.info(f"Updated {model.__name__} with ID: {record_id}")
+            return instance
+            
+        except Exception as e:
+            await self.db.rollback()
+            self.logger.error(f"Error updating {model.__name__} with ID {record_id}: {e}")
+            raise
+
+    async def delete(self, model: Type[T], record_id: Any) -> bool:
+        """Delete a record"""
+        try:
+            self._validate_model(model)
+            result = await self.db.execute(select(model).filter(model.id == record_id))
+            instance = result.scalars().first()
+            if not instance:
+                return False
+                
+            await self.db.delete(instance)
+            await self.db.commit()
+            self._notify_changed(model, [record_id])
+            self.logger.info(f"Deleted {model.__name__} with ID: {record_id}")
+            return True
+            
+        except Exception as e:
+            await self.db.rollback()
+            self.logger.error(f"Error deleting {model.__name__} with ID {record_id}: {e}")
+            raise
+
+    async def get_by_field(self, model: Type[T], field: str, value: Any) -> Optional[T]:
+        """Get a record by any field"""
+        try:
+            self._validate_model(model)
+            sanitized_value = self._sanitize_input(value)
+            result = await self.db.execute(select(model).filter(getattr(model, field) == sanitized_value))
+            return result.scalars().first()
+        except Exception as e:
+            self.logger.error(f"Error getting {model.__name__} by {field}={value}: {e}")
+            raise
+
+    async def get_columns(self, model: Type[T], columns: Sequence[str], filters: Optional[Dict[str, Any]] = None,
+                          limit: Optional[int] = None) -> List[Any]:
+        """Get only `columns` of the records matching `filters` as Row tuples, see DBHelper.get_columns"""
+        try:
+            self._validate_model(model)
+            result = await self.db.execute(self._projection_statement(model, columns, filters, limit))
+            return list(result.all())
+        except Exception as e:
+            self.logger.error(f"Error getting {', '.join(columns)} of {model.__name__}: {e}")
+            raise
+
+    async def get_columns_by_field(self, model: Type[T], field: str, value: Any, columns: Sequence[str]) -> Optional[Any]:
+        """Get only `columns` of the first record matching a field, as a Row tuple (no ORM instance)"""
+        try:
+            self._validate_model(model)
+            result = await self.db.execute(self._projection_statement(model, columns, {field: value}, limit=1))
+            return result.first()
+        except Exception as e:
+            self.logger.error(f"Error getting {model.__name__} by {field}={value}: {e}")
+            raise
+
+    async def get_scalar_by_field(self, model: Type[T], field: str, value: Any, column: str) -> Optional[Any]:
+        """Get one column of the first record matching a field, or None if there is none"""
+        try:
+            self._validate_model(model)
+            result = await self.db.execute(self._projection_statement(model, (column,), {field: value}, limit=1))
+            return result.scalar()
+        except Exception as e:
+            self.logger.error(f"Error getting {model.__name__}.{column} by {field}={value}: {e}")
+            raise
+
+    async def exists(self, model: Type[T], filters: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether any record matches `filters`, as one SELECT EXISTS that stops at the first match"""
+        try:
+            self._validate_model(model)
+            return bool((await self.db.execute(self._exists_statement(model, filters))).scalar())
+        except Exception as e:
+            self.logger.error(f"Error checking for {model.__name__} matching {filters}: {e}")
+            raise
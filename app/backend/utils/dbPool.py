@@ -0,0 +1,143 @@
+import asyncio
+from bisect import bisect_left
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the checkout wait histogram buckets; the last bucket is +Inf
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+class PoolMonitor:
+    """Checkout counters and a wait-time histogram for one engine's connection pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self.wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_sum = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checkout_errors = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_sum += seconds
+        self.wait_counts[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self.pool
+        stats = {
+            "pool_class": type(pool).__name__ if pool is not None else None,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "checkout_errors": self.checkout_errors,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "wait_seconds_sum": round(self.wait_sum, 6),
+            "wait_histogram": {
+                **{str(bound): count for bound, count in zip(WAIT_BUCKETS, self.wait_counts)},
+                "+Inf": self.wait_counts[-1],
+            },
+        }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            })
+        return stats
+
+
+def instrumented_pool_class(base: type, monitor: PoolMonitor) -> type:
+    """
+    Subclass of `base` that times every checkout (including waiting for a free connection
+    and opening a new one) into `monitor`. The monitor is a class
+    attribute so it survives pool.recreate() on engine.dispose().
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = base._do_get(self)
+        except exc.TimeoutError:
+            monitor.timeouts += 1
+            raise
+        except Exception:
+            monitor.checkout_errors += 1
+            raise
+        monitor.observe_wait(time.perf_counter() - started)
+        monitor.pool = self
+        return connection
+
+    def __init__(self, *args, **kwargs):
+        base.__init__(self, *args, **kwargs)
+        monitor.pool = self
+
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get, "__init__": __init__, "monitor": monitor})
+
+
+def pool_options(url: str, is_async: bool = False, monitor: PoolMonitor = None) -> Dict[str, Any]:
+    """
+    create_engine() pool arguments from the environment:
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (s), DB_POOL_RECYCLE (s),
+    DB_POOL_PRE_PING and DB_POOL_USE_LIFO. SQLite keeps SQLAlchemy's default pool.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+        "pool_use_lifo": _env_bool("DB_POOL_USE_LIFO", True),
+    }
+    if monitor is not None:
+        options["poolclass"] = instrumented_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, monitor)
+    return options
+
+
+def attach_monitor(engine, monitor: PoolMonitor) -> None:
+    """Count new and invalidated connections; pool events carry over when the pool is recreated"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    monitor.pool = sync_engine.pool
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        monitor.connects += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        monitor.invalidations += 1
+
+
+async def warm_up(async_engine, connections: int) -> None:
+    """Open `connections` pooled connections at once so the first requests don't pay for connecting"""
+    if connections <= 0:
+        return
+    results = await asyncio.gather(*(async_engine.connect() for _ in range(connections)), return_exceptions=True)
+    opened: List[Any] = [result for result in results if not isinstance(result, BaseException)]
+    for connection in opened:
+        await connection.close()
+    if len(opened) < connections:
+        errors = [result for result in results if isinstance(result, BaseException)]
+        logger.warning(f"Warmed up {len(opened)}/{connections} database connections: {errors[0]}")
+    else:
+        logger.info(f"Warmed up {len(opened)} database connections")
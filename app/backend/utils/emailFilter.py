@@ -0,0 +1,182 @@
+"""
+Bloom filter of registered emails, so lookups for unknown emails can be answered
+"definitely not registered" without a users query.
+
+The filter is loaded at startup by streaming users.email and then kept current by
+- add() from the signup route of this worker,
+- a catch-up query for ids above the highest one seen, less EMAIL_FILTER_ID_LOOKBACK since
+  sequence values can commit out of order (signups on other workers, bulk imports), and for
+  ids reported by the DBHelper change listeners (this worker's imports and email updates).
+A miss runs the catch-up only when the last one is at least EMAIL_FILTER_SYNC_MS old or a
+change listener fired since, so a stream of unknown emails costs at most one query per
+interval. The price is a bounded staleness window: a user committed by another worker or
+process can be reported "not registered" for up to EMAIL_FILTER_SYNC_MS (provided fewer than
+EMAIL_FILTER_ID_LOOKBACK ids were allocated after theirs before they committed). Removed
+users stay in the filter and simply fall through to the database.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, Iterable, Optional, Sequence, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from utils.dbHelper import BaseDBHelper
+from utils.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for `capacity` items at `fp_rate`"""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        if capacity < 1 or not 0 < fp_rate < 1:
+            raise ValueError("capacity must be positive and fp_rate between 0 and 1")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.size = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.items = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        bits = self._bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def estimated_fp_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.items / self.size)) ** self.hashes
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "items": self.items,
+            "memory_bytes": len(self._bits),
+            "hash_functions": self.hashes,
+            "target_fp_rate": self.fp_rate,
+            "estimated_fp_rate": round(self.estimated_fp_rate(), 6),
+        }
+
+
+class RegisteredEmailFilter:
+    """Registered-email membership for the OTP routes, see the module docstring"""
+
+    def __init__(self, capacity: Optional[int] = None, fp_rate: Optional[float] = None,
+                 sync_interval: Optional[float] = None, batch_size: int = 10000):
+        self.enabled = os.getenv("EMAIL_FILTER_ENABLED", "true").lower() == "true"
+        self.capacity = capacity if capacity is not None else int(os.getenv("EMAIL_FILTER_CAPACITY", 1_000_000))
+        self.fp_rate = fp_rate if fp_rate is not None else float(os.getenv("EMAIL_FILTER_FP_RATE", 0.01))
+        self.sync_interval = (
+            sync_interval if sync_interval is not None else float(os.getenv("EMAIL_FILTER_SYNC_MS", 500)) / 1000
+        )
+        self.id_lookback = int(os.getenv("EMAIL_FILTER_ID_LOOKBACK", 100))
+        self.batch_size = batch_size
+        self.bloom: Optional[BloomFilter] = None
+        self.max_id = 0
+        self.synced_at = 0.0
+        self.checks = 0
+        self.negatives = 0
+        self.syncs = 0
+        self._changed_ids: Set[int] = set()
+        self._sync_lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.bloom is not None
+
+    async def load(self, db: AsyncSession) -> None:
+        """Build the filter from a streamed scan of users.email"""
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        count, max_id = (await db.execute(select(func.count(User.id), func.max(User.id)))).one()
+        # Leave room for growth so the false positive rate holds until the next restart
+        bloom = BloomFilter(max(self.capacity, 2 * count), self.fp_rate)
+        synced_at = time.monotonic()
+        result = await db.stream(
+            select(User.email).where(User.id <= (max_id or 0)).execution_options(yield_per=self.batch_size)
+        )
+        async for batch in result.partitions():
+            for (email,) in batch:
+                bloom.add(email)
+        self.bloom, self.max_id, self.synced_at = bloom, max_id or 0, synced_at
+        logger.info(
+            f"Registered email filter loaded with {bloom.items} emails in {time.perf_counter() - started:.2f}s "
+            f"({bloom.stats()['memory_bytes'] / 2**20:.1f} MiB, {bloom.hashes} hashes)"
+        )
+
+    def add(self, email: str) -> None:
+        # The catch-up will see this worker's signups again; skip them so `items` stays a distinct count
+        if self.bloom is not None and email not in self.bloom:
+            self.bloom.add(email)
+
+    def note_changed(self, user_ids: Sequence[Any]) -> None:
+        """DBHelper change listener: re-read these users' emails on the next catch-up"""
+        if self.bloom is not None:
+            self._changed_ids.update(user_ids)
+
+    @property
+    def due(self) -> bool:
+        return bool(self._changed_ids) or time.monotonic() - self.synced_at >= self.sync_interval
+
+    async def might_exist(self, db: AsyncSession, email: str) -> bool:
+        """False only if `email` was not registered as of the last catch-up, at most EMAIL_FILTER_SYNC_MS ago"""
+        if self.bloom is None:
+            return True
+        self.checks += 1
+        if email in self.bloom:
+            return True
+        if self.due:
+            await self._catch_up(db)
+            if email in self.bloom:
+                return True
+        self.negatives += 1
+        return False
+
+    async def _catch_up(self, db: AsyncSession) -> None:
+        async with self._sync_lock:
+            # Concurrent misses share one catch-up: the others find it no longer due
+            if not self.due:
+                return
+            now = time.monotonic()
+            changed, self._changed_ids = self._changed_ids, set()
+            recent = User.id > self.max_id - self.id_lookback
+            query = select(User.id, User.email).where(recent | User.id.in_(changed) if changed else recent)
+            for user_id, email in (await db.execute(query)).all():
+                self.add(email)
+                self.max_id = max(self.max_id, user_id)
+            self.synced_at = now
+            self.syncs += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            **(self.bloom.stats() if self.bloom else {}),
+            "max_user_id": self.max_id,
+            "sync_interval_ms": self.sync_interval * 1000,
+            "checks": self.checks,
+            "negatives": self.negatives,
+            "catch_up_syncs": self.syncs,
+        }
+
+
+registered_emails = RegisteredEmailFilter()
+BaseDBHelper.add_change_listener(User, registered_emails.note_changed)
@@ -1,29 +1,41 @@
 import os
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import random
 import string
-from datetime import datetime, timedelta
-from cachetools import TTLCache
+from datetime import datetime
 import logging
 
+from starlette.concurrency import run_in_threadpool
+
+from utils.emailQueue import EmailDeliveryQueue, SMTPConnection
+from utils.otpStore import create_otp_store
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EmailHelper:
     def __init__(self):
         """
-        Initialize email helper with SMTP credentials and cache settings
+        Initialize email helper with SMTP credentials and OTP store settings
         Environment variables for SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, and SMTP_PASSWORD handle in docker-compose.yaml file
         """
         self.smtp_server = os.getenv("SMTP_SERVER")
         self.smtp_port = int(os.getenv("SMTP_PORT", 587))
         self.username = os.getenv("SMTP_USERNAME")
         self.password = os.getenv("SMTP_PASSWORD")
+        self.use_tls = os.getenv("SMTP_USE_TLS", "true").lower() != "false"
         
-        # Cache with 5 minute TTL (time-to-live)
-        self.otp_cache = TTLCache(maxsize=1000, ttl=300)    # 5 minutes
+        # Background delivery: a bounded queue drained by a pool of kept-alive SMTP connections
+        self.delivery_queue = EmailDeliveryQueue(
+            connection_factory=self._create_connection,
+            workers=int(os.getenv("SMTP_POOL_SIZE", 4)),
+            max_queue_size=int(os.getenv("SMTP_QUEUE_SIZE", 1000)),
+            max_retries=int(os.getenv("SMTP_MAX_RETRIES", 2)),
+        )
+        
+        # OTP store with OTP_TTL_SECONDS TTL (time-to-live, default 5 minutes), backend selected by OTP_STORE
+        self.otp_store = create_otp_store()
         
         # Email template
         self.email_template = """
@@ -31,64 +43,113 @@ class EmailHelper:
             <body>
                 <h2>Your One-Time Password (OTP)</h2>
                 <p>Your verification code is: <strong>{otp}</strong></p>
-                <p>This code will expire in 5 minutes.</p>
+                <p>This code will expire in {expiry}.</p>
             </body>
         </html>
         """
     
+    @staticmethod
+    def _format_expiry(seconds: float) -> str:
+        """OTP lifetime for the email body, e.g. 5 minutes or 90 seconds"""
+        seconds = round(seconds)
+        if seconds % 60 == 0:
+            minutes = seconds // 60
+            return f"{minutes} minute{'s' if minutes != 1 else ''}"
+        return f"{seconds} second{'s' if seconds != 1 else ''}"
+    
     def _generate_otp(self, length: int = 6) -> str:
         """Generate a random numeric OTP"""
         return ''.join(random.choices(string.digits, k=length))
     
-    def send_otp(self, recipient_email: str) -> bool:
+    def _create_connection(self) -> SMTPConnection:
+        return SMTPConnection(
+            self.smtp_server,
+            self.smtp_port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+        )
+    
+    def _build_otp_message(self, recipient_email: str, otp: str) -> MIMEMultipart:
+        """Create the OTP email message"""
+        msg = MIMEMultipart()
+        msg['From'] = self.username
+        msg['To'] = recipient_email
+        msg['Subject'] = "Your Verification Code to SafeCheck"
+        
+        # Add HTML body
+        body = self.email_template.format(otp=otp, expiry=self._format_expiry(self.otp_store.ttl))
+        msg.attach(MIMEText(body, 'html'))
+        return msg
+    
+    def _issue_otp(self, recipient_email: str) -> str:
+        """Generate an OTP and store it in the OTP store"""
+        otp = self._generate_otp()
+        self.otp_store.put(recipient_email, otp)
+        return otp
+    
+    async def _run_store(self, func, *args):
+        """Run an OTP store operation, in the threadpool when the backend blocks on I/O"""
+        if self.otp_store.blocking:
+            return await run_in_threadpool(func, *args)
+        return func(*args)
+    
+    async def start(self) -> None:
+        """Start the background delivery workers"""
+        await self.delivery_queue.start()
+    
+    async def stop(self) -> None:
+        """Drain queued emails and close the pooled SMTP connections"""
+        await self.delivery_queue.stop()
+    
+    async def queue_otp(self, recipient_email: str) -> bool:
         """
-        Send OTP to the specified email and store it in cache
+        Generate an OTP, store it and queue the email for background delivery
         
         Args:
             recipient_email: Email address to send OTP to
             
         Returns:
-            bool: True if email was sent successfully, False otherwise
+            bool: True if the email was queued, False if the delivery queue is full or not running
         """
         try:
-            logger.info(f"Request to send OTPsssssssssss: {recipient_email}") 
-            logger.info(f"self.username: {self.username}") 
-            logger.info(f"self.SMTP_PASSWORD: {self.password}")
-            # Generate OTP
-            otp = self._generate_otp()
-            
-            # Create email message
-            msg = MIMEMultipart()
-            msg['From'] = self.username
-            msg['To'] = recipient_email
-            msg['Subject'] = "Your Verification Code to SafeCheck"
-            
-            # Add HTML body
-            body = self.email_template.format(otp=otp)
-            msg.attach(MIMEText(body, 'html'))
+            otp = await self._run_store(self._issue_otp, recipient_email)
+            queued = self.delivery_queue.enqueue(self._build_otp_message(recipient_email, otp))
+            if queued:
+                logger.info(f"OTP queued for {recipient_email}")
+            return queued
             
-            # Store OTP in cache
-            self.otp_cache[recipient_email] = {
-                'otp': otp,
-                'generated_at': datetime.now()
-            }
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                server.send_message(msg)
+        except Exception as e:
+            logger.error(f"Failed to queue OTP for {recipient_email}: {e}")
+            return False
+    
+    def send_otp(self, recipient_email: str) -> bool:
+        """
+        Send OTP to the specified email synchronously and store it.
+        Blocks for the full SMTP exchange, request handlers should use queue_otp instead.
+        
+        Args:
+            recipient_email: Email address to send OTP to
             
+        Returns:
+            bool: True if email was sent successfully, False otherwise
+        """
+        connection = self._create_connection()
+        try:
+            otp = self._issue_otp(recipient_email)
+            connection.send(self._build_otp_message(recipient_email, otp))
             logger.info(f"OTP sent to {recipient_email}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to send OTP to {recipient_email}: {e}")
             return False
+        finally:
+            connection.close()
     
-    def verify_otp(self, email: str, user_provided_otp: str) -> bool:
+    async def verify_otp(self, email: str, user_provided_otp: str) -> bool:
         """
-        Verify if the provided OTP matches the one in cache
+        Verify if the provided OTP matches the one in the OTP store
         
         Args:
             email: Email address to verify
@@ -97,21 +158,24 @@ class EmailHelper:
         Returns:
             bool: True if OTP is valid, False otherwise
         """
+        return await self._run_store(self._check_otp, email, user_provided_otp)
+    
+    def _check_otp(self, email: str, user_provided_otp: str) -> bool:
+        """Compare the OTP with the stored one and consume it on a match"""
         try:
-            cached_data = self.otp_cache.get(email)
+            record = self.otp_store.get(email)
             
-            if not cached_data:
-                logger.warning(f"No OTP found in cache for {email}")
+            if not record:
+                logger.warning(f"No OTP found in store for {email}")
                 return False
                 
-            logger.info(f"Found cached OTP for {email}. Generated at: {cached_data['generated_at']}")
-            logger.info(f"Type check - cached OTP: {type(cached_data['otp'])}, user OTP: {type(user_provided_otp)}")
-            if int(cached_data['otp']) == user_provided_otp:
-                self.otp_cache.pop(email, None)
+            logger.info(f"Found stored OTP for {email}. Generated at: {datetime.fromtimestamp(record.generated_at)}")
+            if int(record.otp) == user_provided_otp:
+                self.otp_store.delete(email)
                 logger.info(f"OTP verified successfully for {email}")
                 return True
                 
-            logger.warning(f"Invalid OTP for {email}. Expected: {cached_data['otp']}, Received: {user_provided_otp}")
+            logger.warning(f"Invalid OTP for {email}")
             return False
             
         except Exception as e:
@@ -0,0 +1,207 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import smtplib
+import time
+from typing import Callable, Deque, Dict, Optional
+
+from utils.statsHelper import latency_summary
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnection:
+    """
+    One authenticated SMTP session that is kept open and reused across sends.
+    The connection is opened lazily, checked with NOOP after it has been idle and
+    re-established whenever the server drops it.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        timeout: float = 10.0,
+        idle_check_after: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_check_after = idle_check_after
+        self.connects = 0
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> None:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self.connects += 1
+
+    def _ensure(self) -> smtplib.SMTP:
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_check_after:
+            try:
+                if self._server.noop()[0] != 250:
+                    self.close()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._server is None:
+            self._connect()
+        return self._server
+
+    def send(self, message) -> None:
+        """Send a message, reconnecting once if the kept-alive session has gone away"""
+        try:
+            self._ensure().send_message(message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.close()
+            self._ensure().send_message(message)
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+
+class EmailDeliveryQueue:
+    """
+    Asynchronous email delivery:
+    - enqueue() never blocks the event loop, it only places the message on a bounded queue
+    - a fixed pool of workers each owns one SMTPConnection and sends from a dedicated thread pool
+    - failed sends are retried with a fresh connection before the message is dropped
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], SMTPConnection],
+        workers: int = 4,
+        max_queue_size: int = 1000,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+        latency_window: int = 1024,
+    ):
+        self.connection_factory = connection_factory
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._connections = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._counters = {"enqueued": 0, "rejected": 0, "sent": 0, "failed": 0, "retried": 0}
+        self._send_latency: Deque[float] = deque(maxlen=latency_window)
+        self._queue_wait: Deque[float] = deque(maxlen=latency_window)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="smtp")
+        for index in range(self.workers):
+            connection = self.connection_factory()
+            self._connections.append(connection)
+            self._tasks.append(asyncio.create_task(self._worker(connection), name=f"smtp-worker-{index}"))
+        logger.info(f"Email delivery queue started with {self.workers} workers")
+
+    async def stop(self, drain: bool = True, timeout: float = 10.0) -> None:
+        """Stop the workers, optionally waiting up to `timeout` seconds for queued mail"""
+        if not self.running:
+            return
+        if drain:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Email queue stopped with {self._queue.qsize()} undelivered messages")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        loop = asyncio.get_running_loop()
+        for connection in self._connections:
+            await loop.run_in_executor(self._executor, connection.close)
+        self._connections = []
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    def enqueue(self, message) -> bool:
+        """Queue a message for delivery; returns False when the queue is full or not running"""
+        if not self.running:
+            self._counters["rejected"] += 1
+            return False
+        try:
+            self._queue.put_nowait((time.perf_counter(), message))
+        except asyncio.QueueFull:
+            self._counters["rejected"] += 1
+            logger.warning(f"Email queue full, rejected message to {message['To']}")
+            return False
+        self._counters["enqueued"] += 1
+        return True
+
+    async def _worker(self, connection: SMTPConnection) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            enqueued_at, message = await self._queue.get()
+            self._queue_wait.append(time.perf_counter() - enqueued_at)
+            self._in_flight += 1
+            try:
+                await self._deliver(loop, connection, message)
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+
+    async def _deliver(self, loop, connection: SMTPConnection, message) -> None:
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                await loop.run_in_executor(self._executor, connection.send, message)
+                self._send_latency.append(time.perf_counter() - started)
+                self._counters["sent"] += 1
+                logger.info(f"Email sent to {message['To']}")
+                return
+            except Exception as e:
+                await loop.run_in_executor(self._executor, connection.close)
+                if attempt == self.max_retries:
+                    self._counters["failed"] += 1
+                    logger.error(f"Failed to send email to {message['To']}: {e}")
+                    return
+                self._counters["retried"] += 1
+                await asyncio.sleep(self.retry_backoff * (attempt + 1))
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_capacity": self.max_queue_size,
+            "in_flight": self._in_flight,
+            **self._counters,
+            "smtp_connects": sum(connection.connects for connection in self._connections),
+            "send_latency_ms": latency_summary(self._send_latency),
+            "queue_wait_ms": latency_summary(self._queue_wait),
+        }
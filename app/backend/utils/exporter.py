@@ -0,0 +1,167 @@
+"""
+Streaming table exports as NDJSON or CSV.
+
+Rows are read in id order through a server-side cursor (stream_results + yield_per), so
+only one batch is in memory at a time, and encoded straight to bytes without building ORM
+objects. An export can be resumed after an interruption by passing the id of the last row
+received as `after_id`.
+"""
+import csv
+from datetime import datetime
+from enum import Enum
+import io
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Boolean, Integer, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from utils.apiResponseHandler import dumps
+from utils.models import User, UserHistory
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Exportable tables with their columns and the columns that can be filtered on by equality
+EXPORTS = {
+    "users": (
+        User,
+        ("id", "name", "email", "date_of_birth", "month_of_birth", "year_of_birth",
+         "is_active", "is_verified", "created_ts", "modified_ts"),
+        ("is_active", "is_verified"),
+    ),
+    "user_history": (
+        UserHistory,
+        ("id", "user_id", "age", "annual_income", "no_of_dependent", "risk_capacity", "created_ts", "modified_ts"),
+        ("user_id", "risk_capacity"),
+    ),
+}
+RANGE_FILTERS = ("created_from", "created_to")
+
+FLUSH_BYTES = 64 * 1024
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _filter_value(column, raw: str) -> Any:
+    if isinstance(column.type, Boolean):
+        if raw.lower() not in ("true", "false", "1", "0"):
+            raise ValueError(f"{column.key} must be true or false")
+        return raw.lower() in ("true", "1")
+    if isinstance(column.type, Integer):
+        return int(raw)
+    enum_class = getattr(column.type, "enum_class", None)
+    if enum_class is not None:
+        return enum_class(raw)
+    return raw
+
+
+def export_statement(table: str, filters: Optional[Dict[str, str]] = None, after_id: Optional[int] = None):
+    """
+    SELECT for an export, in id order.
+
+    Args:
+        filters: raw string values for the table's filter columns, plus created_from /
+                 created_to (ISO timestamps, inclusive / exclusive)
+        after_id: resume after this id
+    Raises:
+        ValueError for unknown tables, filters or unparsable values
+    """
+    if table not in EXPORTS:
+        raise ValueError(f"Unknown export table {table!r}, expected one of {', '.join(EXPORTS)}")
+    model, columns, filter_columns = EXPORTS[table]
+    query = select(*[getattr(model, column) for column in columns])
+    for name, raw in (filters or {}).items():
+        if name == "created_from":
+            query = query.filter(model.created_ts >= datetime.fromisoformat(raw))
+        elif name == "created_to":
+            query = query.filter(model.created_ts < datetime.fromisoformat(raw))
+        elif name in filter_columns:
+            column = getattr(model, name)
+            query = query.filter(column == _filter_value(column, raw))
+        else:
+            raise ValueError(
+                f"Cannot filter {table} by {name!r}, expected one of {', '.join(filter_columns + RANGE_FILTERS)}"
+            )
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    return query.order_by(model.id)
+
+
+def export_columns(table: str) -> Sequence[str]:
+    return EXPORTS[table][1]
+
+
+class RowEncoder:
+    """Encodes row tuples as NDJSON lines or CSV records into ~FLUSH_BYTES chunks"""
+
+    def __init__(self, columns: Sequence[str], fmt: str):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+        self.columns = list(columns)
+        self.fmt = fmt
+        self._text = io.StringIO()
+        self._csv = csv.writer(self._text, lineterminator="\n")
+
+    def header(self) -> bytes:
+        if self.fmt != "csv":
+            return b""
+        self._csv.writerow(self.columns)
+        return self._drain()
+
+    def encode(self, rows: Iterable[Tuple]) -> bytes:
+        if self.fmt == "ndjson":
+            columns = self.columns
+            return b"".join(dumps(dict(zip(columns, map(_plain, row)))) + b"\n" for row in rows)
+        self._csv.writerows(["" if value is None else _plain(value) for value in row] for row in rows)
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        data = self._text.getvalue().encode("utf-8")
+        self._text.seek(0)
+        self._text.truncate()
+        return data
+
+
+def iter_export(db: Session, table: str, fmt: str, filters: Optional[Dict[str, str]] = None,
+                after_id: Optional[int] = None, batch_size: int = 1000) -> Iterator[bytes]:
+    """Export chunks from a sync session (used by the CLI)"""
+    encoder = RowEncoder(export_columns(table), fmt)
+    statement = export_statement(table, filters, after_id).execution_options(stream_results=True, yield_per=batch_size)
+    yield encoder.header()
+    pending: List[bytes] = []
+    size = 0
+    for batch in db.execute(statement).partitions():
+        chunk = encoder.encode(batch)
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= FLUSH_BYTES:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b"".join(pending)
+
+
+async def aiter_export(db: AsyncSession, table: str, fmt: str, filters: Optional[Dict[str, str]] = None,
+                       after_id: Optional[int] = None, batch_size: int = 1000) -> AsyncIterator[bytes]:
+    """Export chunks from an async session (used by the streaming endpoint)"""
+    encoder = RowEncoder(export_columns(table), fmt)
+    statement = export_statement(table, filters, after_id).execution_options(yield_per=batch_size)
+    yield encoder.header()
+    pending: List[bytes] = []
+    size = 0
+    result = await db.stream(statement)
+    async for batch in result.partitions():
+        chunk = encoder.encode(batch)
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= FLUSH_BYTES:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b"".join(pending)
@@ -0,0 +1,158 @@
+import asyncio
+from collections import deque
+import logging
+import time
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from utils.dbHelper import AsyncDBHelper
+from utils.models import UserHistory
+from utils.statsHelper import latency_summary
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriteBuffer:
+    """
+    Write-behind buffer for user history inserts (group commit).
+
+    submit() appends a record to an in-process buffer and returns a future. A single
+    flusher task writes the buffer as one multi-row INSERT ... RETURNING transaction once
+    `max_batch` records are waiting or `max_delay` seconds after the first one arrived,
+    then resolves every future with the durable (id, created_ts) row. While a flush is
+    running new records keep accumulating, so batches grow with load and the database
+    sees one commit per batch instead of one per request.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_batch: int = 200,
+        max_delay: float = 0.02,
+        max_pending: int = 10000,
+        stats_window: int = 1024,
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+
+        self._queue: asyncio.Queue = None
+        self._batch_ready: asyncio.Event = None
+        self._task: asyncio.Task = None
+        self._counters = {"submitted": 0, "flushes": 0, "rows_written": 0, "failed_flushes": 0, "failed_rows": 0}
+        self._flush_sizes: Deque[int] = deque(maxlen=stats_window)
+        self._flush_latency: Deque[float] = deque(maxlen=stats_window)
+        self._commit_wait: Deque[float] = deque(maxlen=stats_window)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="history-write-behind")
+        logger.info(f"History write-behind started (max_batch={self.max_batch}, max_delay={self.max_delay}s)")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything already submitted, then stop the flusher"""
+        if not self.running:
+            return
+        self._batch_ready.set()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"History write-behind stopped with {self._queue.qsize()} unwritten records")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def submit(self, record: Dict[str, Any]) -> asyncio.Future:
+        """
+        Buffer a history record. Waits only when `max_pending` records are already buffered.
+
+        Returns:
+            Future resolving to the inserted row (with id and created_ts) once it is committed
+        """
+        if not self.running:
+            raise RuntimeError("History write-behind buffer is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((time.perf_counter(), record, future))
+        self._counters["submitted"] += 1
+        if self._queue.qsize() >= self.max_batch:
+            self._batch_ready.set()
+        return future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.qsize() < self.max_batch - 1:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, records: List[Dict[str, Any]]) -> List[Any]:
+        async with self.session_factory() as db:
+            return await AsyncDBHelper(db).create_many(
+                UserHistory, records, chunk_size=self.max_batch, returning=("id", "created_ts")
+            )
+
+    async def _flush(self, batch: List[Tuple[float, Dict[str, Any], asyncio.Future]]) -> None:
+        started = time.perf_counter()
+        try:
+            rows = await self._write([record for _, record, _ in batch])
+        except Exception as e:
+            # Retry one by one so a single bad record doesn't fail the whole group
+            logger.error(f"History flush of {len(batch)} records failed, retrying individually: {e}")
+            self._counters["failed_flushes"] += 1
+            rows = []
+            for _, record, future in batch:
+                try:
+                    rows.extend(await self._write([record]))
+                except Exception as row_error:
+                    self._counters["failed_rows"] += 1
+                    rows.append(row_error)
+
+        finished = time.perf_counter()
+        self._counters["flushes"] += 1
+        self._flush_sizes.append(len(batch))
+        self._flush_latency.append(finished - started)
+        for (submitted_at, _, future), row in zip(batch, rows):
+            if future.done():
+                continue
+            if isinstance(row, Exception):
+                future.set_exception(row)
+            else:
+                self._counters["rows_written"] += 1
+                self._commit_wait.append(finished - submitted_at)
+                future.set_result(row)
+
+    def stats(self) -> Dict:
+        sizes = sorted(self._flush_sizes)
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "max_batch": self.max_batch,
+            "max_delay_ms": self.max_delay * 1000,
+            **self._counters,
+            "flush_size": {
+                "avg": round(sum(sizes) / len(sizes), 2) if sizes else None,
+                "p50": sizes[len(sizes) // 2] if sizes else None,
+                "max": sizes[-1] if sizes else None,
+            },
+            "flush_latency_ms": latency_summary(self._flush_latency),
+            "commit_wait_ms": latency_summary(self._commit_wait),
+        }
@@ -0,0 +1,147 @@
+from bisect import bisect_left
+import time
+from typing import Dict, List, Tuple
+
+# Upper bounds (seconds) of the request latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RouteStats:
+    __slots__ = ("buckets", "total", "count", "statuses")
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.statuses: Dict[int, int] = {}
+
+    def quantile(self, q: float) -> float:
+        """Estimate a latency quantile by linear interpolation inside the histogram bucket"""
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return 0.0
+
+
+class MetricsRegistry:
+    """Per-route request counters, status codes, latency histograms and in-flight gauges"""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.in_flight: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, method: str, route: str, status: int, duration: float) -> None:
+        key = (method, route)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats()
+        stats.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+        stats.total += duration
+        stats.count += 1
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), stats in sorted(self.routes.items()):
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency, by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in sorted(self.routes.items()):
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), stats.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.total:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {stats.count}")
+
+        lines += [
+            "# HELP http_request_duration_quantile_seconds Latency percentiles estimated from the histogram.",
+            "# TYPE http_request_duration_quantile_seconds gauge",
+        ]
+        for (method, route), stats in sorted(self.routes.items()):
+            for q in QUANTILES:
+                lines.append(
+                    f'http_request_duration_quantile_seconds{{method="{method}",route="{route}",quantile="{q}"}} '
+                    f"{stats.quantile(q):.6f}"
+                )
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for (method, route), count in sorted(self.in_flight.items()):
+            lines.append(f'http_requests_in_flight{{method="{method}",route="{route}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware feeding a MetricsRegistry. Requests are labelled with the matched
+    route template (e.g. /users/{user_id}/history) rather than the raw path, so label
+    cardinality stays bounded; requests that match no route are labelled "unmatched".
+    The in-flight gauge is raised before the router runs, so the middleware matches the
+    template itself for it, the same way the router does.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = self.registry.in_flight
+        key = (method, self._match_route(scope))
+        in_flight[key] = in_flight.get(key, 0) + 1
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight[key] -= 1
+            route = scope.get("route")
+            self.registry.observe(
+                method, getattr(route, "path", "unmatched"), status, time.perf_counter() - started
+            )
+
+    @staticmethod
+    def _match_route(scope) -> str:
+        # Only each route's path regex and methods, which is what the router's match decides on;
+        # route.matches() would also build a child scope per route. A full match wins, else the
+        # first route whose path matched (wrong method, answered with 405)
+        path, method, partial = scope["path"], scope["method"], None
+        for route in getattr(getattr(scope.get("app"), "router", None), "routes", ()):
+            regex = getattr(route, "path_regex", None)
+            if regex is None or not regex.match(path):
+                continue
+            methods = getattr(route, "methods", None)
+            if not methods or method in methods:
+                return route.path
+            if partial is None:
+                partial = route.path
+        return partial or "unmatched"
@@ -2,32 +2,124 @@
 from datetime import datetime
 from enum import Enum
 import os
-from typing import List, Optional
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, Date, Enum as SQLEnum, \
-    ForeignKey, ARRAY, Float, JSON, DateTime, func, CheckConstraint
+import threading
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, Enum as SQLEnum, \
+    ForeignKey, Float, JSON, DateTime, func, CheckConstraint, Index, inspect
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship, validates
 from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
 import logging
 
+from utils.dbPool import PoolMonitor, attach_monitor, pool_options
+from utils.queryProfiler import query_profiler
+
 logger = logging.getLogger(__name__)
 
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-try:
-    engine = create_engine(DATABASE_URL)
-    if not engine:
-        raise ValueError("Database URL is not set or invalid")
-    # Test the connection immediately
-    logger.info("✅ Database connection established successfully")
-except Exception as e:
-    logger.error(f"❌ Failed to connect to database: {e}")
-    raise
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Pool sizing comes from DB_POOL_* environment settings, see utils/dbPool.py
+sync_pool_monitor = PoolMonitor("sync")
+async_pool_monitor = PoolMonitor("async")
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching asyncio driver"""
+    for prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite+pysqlite://", "sqlite+aiosqlite://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Engines are created on first use rather than at import, so importing the models
+# (CLI tools, benchmarks, workers that skip schema setup) doesn't load database drivers.
+_engine = None
+_async_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                try:
+                    if not DATABASE_URL:
+                        raise ValueError("Database URL is not set or invalid")
+                    created = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, monitor=sync_pool_monitor))
+                    attach_monitor(created, sync_pool_monitor)
+                    query_profiler.attach(created)
+                    logger.info("✅ Database connection established successfully")
+                except Exception as e:
+                    logger.error(f"❌ Failed to connect to database: {e}")
+                    raise
+                _engine = created
+    return _engine
+
+
+# Async engine used by the request handlers so database waits don't block the event loop.
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                created = create_async_engine(
+                    ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, is_async=True, monitor=async_pool_monitor)
+                )
+                attach_monitor(created, async_pool_monitor)
+                query_profiler.attach(created)
+                _async_engine = created
+    return _async_engine
+
+
+class LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to get_engine() when the first session is opened"""
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+class LazyAsyncSessionmaker(async_sessionmaker):
+    """async_sessionmaker that binds to get_async_engine() when the first session is opened"""
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_async_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
+# expire_on_commit=False keeps loaded attributes readable after commit without an implicit (sync) reload.
+AsyncSessionLocal = LazyAsyncSessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def __getattr__(name):
+    # `engine` and `async_engine` stay importable as module attributes; they are created on first access
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 Base = declarative_base()
 
+# SQLite fills server_default=func.now() as "YYYY-MM-DD HH:MM:SS" text. Columns compared by range
+# (keyset pagination) bind values in that same format there, so text comparison orders correctly.
+SQLITE_SERVER_TIMESTAMP = SQLITE_DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
+
 # Enums
 class RiskCapacity(str, Enum):
     LOW = "low"
@@ -95,7 +187,7 @@ class UserHistory(Base):
     annual_income = Column(Integer, nullable=False)
     no_of_dependent=Column(Integer, nullable=False)
     risk_capacity = Column(SQLEnum(RiskCapacity), nullable=False)
-    created_ts = Column(DateTime, server_default=func.now())
+    created_ts = Column(DateTime().with_variant(SQLITE_SERVER_TIMESTAMP, "sqlite"), server_default=func.now())
     modified_ts = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationship
@@ -109,6 +201,8 @@ class UserHistory(Base):
     
     __table_args__ = (
         CheckConstraint('age BETWEEN 18 AND 100', name='check_age_range'),
+        # Per-user history in time order; backs keyset pagination on (user_id, created_ts, id)
+        Index('ix_user_history_user_created_id', 'user_id', 'created_ts', 'id'),
     )
 
 # LIC Plan Model
@@ -122,7 +216,7 @@ class LICPlan(Base):
     max_age = Column(Integer, nullable=False)
     min_sum_assured = Column(Float, nullable=False)
     max_sum_assured = Column(Float, nullable=False)
-    risk_capacity = Column(PG_ARRAY(String(10)), nullable=False)  # Array of RiskCapacity
+    risk_capacity = Column(PG_ARRAY(String(10)).with_variant(JSON, "sqlite"), nullable=False)  # Array of RiskCapacity
     description = Column(String, nullable=True)
     features = Column(JSON, nullable=True)
     is_active = Column(Boolean, default=True)
@@ -148,18 +242,65 @@ class LICPlan(Base):
         CheckConstraint('max_age <= 100', name='check_max_age'),
         CheckConstraint('max_age >= min_age', name='check_age_range'),
         CheckConstraint('max_sum_assured >= min_sum_assured', name='check_sum_assured'),
-        CheckConstraint("array_length(risk_capacity, 1) > 0", name='check_risk_capacity_not_empty'),
+        CheckConstraint("array_length(risk_capacity, 1) > 0", name='check_risk_capacity_not_empty').ddl_if(
+            dialect="postgresql"
+        ),
+    )
+
+# Eligible plans ranked by base score for every (age, risk_capacity), kept in step with lic_plans
+# by utils/planRecommendations.py; base_score is the match score before the dependents factor
+class PlanRecommendation(Base):
+    __tablename__ = "plan_recommendations"
+
+    age = Column(Integer, primary_key=True)
+    risk_capacity = Column(SQLEnum(RiskCapacity), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    plan_id = Column(Integer, ForeignKey('lic_plans.id', ondelete="CASCADE"), nullable=False, index=True)
+    base_score = Column(Float, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint('age BETWEEN 18 AND 100', name='check_recommendation_age_range'),
     )
 
+# Pending OTP codes, used when OTP_STORE=database so every worker sees the same codes
+class OTPCode(Base):
+    __tablename__ = "otp_codes"
+    
+    email = Column(String(255), primary_key=True)
+    otp = Column(String(10), nullable=False)
+    generated_at = Column(Float, nullable=False)  # epoch seconds
+    expires_at = Column(Float, nullable=False, index=True)  # epoch seconds
+
+# Fingerprint of the schema and seed data the database was last initialized with (see utils/seeds_plans.py)
+class SchemaFingerprint(Base):
+    __tablename__ = "schema_fingerprint"
+    
+    name = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    applied_ts = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
 # Create all tables
 def init_db():
     try:
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=get_engine())
         logger.info("✅ Database tables created/verified successfully")
     except Exception as e:
         logger.error(f"❌ Failed to create database tables: {e}")
         raise
 
+# create_all only creates missing tables; add indexes declared since an existing table was created
+def create_missing_indexes(bind) -> None:
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                logger.info(f"Creating missing index {index.name} on {table.name}")
+                index.create(bind=bind)
+
 # Database session dependency
 def get_db():
     db = SessionLocal()
@@ -172,4 +313,18 @@ def get_db():
         raise
     finally:
         db.close()
-        logger.debug("ℹ️ Database session closed")
\ No newline at end of file
+        logger.debug("ℹ️ Database session closed")
+
+# Async database session dependency
+async def get_async_db():
+    db = AsyncSessionLocal()
+    try:
+        logger.debug("ℹ️ Async database session created")
+        yield db
+    except Exception as e:
+        logger.error(f"⚠️ Database session error: {e}")
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+        logger.debug("ℹ️ Async database session closed")
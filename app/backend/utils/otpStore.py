@@ -0,0 +1,243 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set
+import logging
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+logger = logging.getLogger(__name__)
+
+
+class OTPRecord:
+    """A pending OTP; timestamps are epoch seconds"""
+    __slots__ = ("otp", "generated_at", "expires_at")
+
+    def __init__(self, otp: str, generated_at: float, expires_at: float):
+        self.otp = otp
+        self.generated_at = generated_at
+        self.expires_at = expires_at
+
+
+class OTPStore:
+    """
+    Interface shared by all OTP backends. Records are keyed by email and expire
+    `ttl` seconds after they are stored; expired records are never returned.
+    Backends with `blocking` set do I/O, so async callers run them in the threadpool.
+    """
+
+    blocking = False
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+
+    def put(self, email: str, otp: str) -> None:
+        raise NotImplementedError
+
+    def get(self, email: str) -> Optional[OTPRecord]:
+        raise NotImplementedError
+
+    def delete(self, email: str) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class InMemoryOTPStore(OTPStore):
+    """
+    Per-process store without a size cap. Expiry uses a hashed timing wheel:
+    each record is also filed under the wheel slot of its expiry tick, and advancing
+    the wheel only visits the slots that have come due, so cleanup cost is proportional
+    to the number of expiring records rather than the size of the store.
+    """
+
+    def __init__(self, ttl: float = 300, resolution: float = 1.0, slots: int = 512):
+        super().__init__(ttl)
+        self.resolution = resolution
+        self._records: Dict[str, OTPRecord] = {}
+        self._wheel: List[Set[str]] = [set() for _ in range(slots)]
+        self._tick = int(time.time() / resolution)
+        self._lock = threading.Lock()
+
+    def _advance(self, now: float) -> None:
+        current = int(now / self.resolution)
+        # Visiting every slot once is enough to catch up after a long idle period
+        for tick in range(max(self._tick + 1, current - len(self._wheel) + 1), current + 1):
+            slot = self._wheel[tick % len(self._wheel)]
+            if not slot:
+                continue
+            survivors = set()
+            for email in slot:
+                record = self._records.get(email)
+                if record is None:
+                    continue
+                if record.expires_at <= now:
+                    del self._records[email]
+                elif int(record.expires_at / self.resolution) % len(self._wheel) == tick % len(self._wheel):
+                    # Due in a later rotation of the wheel
+                    survivors.add(email)
+            self._wheel[tick % len(self._wheel)] = survivors
+        self._tick = max(self._tick, current)
+
+    def put(self, email: str, otp: str) -> None:
+        now = time.time()
+        record = OTPRecord(otp, now, now + self.ttl)
+        with self._lock:
+            self._advance(now)
+            self._records[email] = record
+            self._wheel[int(record.expires_at / self.resolution) % len(self._wheel)].add(email)
+
+    def get(self, email: str) -> Optional[OTPRecord]:
+        now = time.time()
+        with self._lock:
+            self._advance(now)
+            record = self._records.get(email)
+        if record is None or record.expires_at <= now:
+            return None
+        return record
+
+    def delete(self, email: str) -> None:
+        with self._lock:
+            # The wheel entry is dropped lazily when its slot comes due
+            self._records.pop(email, None)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class SQLiteOTPStore(OTPStore):
+    """
+    Store in a memory-mapped SQLite file in WAL mode, shared by every worker process
+    on the host that points at the same path.
+    """
+
+    PURGE_EVERY = 256
+    blocking = True
+
+    def __init__(self, path: str, ttl: float = 300, mmap_size: int = 64 * 1024 * 1024):
+        super().__init__(ttl)
+        self.path = path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self._puts = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS otp_codes ("
+                "email TEXT PRIMARY KEY, otp TEXT NOT NULL, "
+                "generated_at REAL NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_otp_codes_expires_at ON otp_codes (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.conn = conn
+        return conn
+
+    def put(self, email: str, otp: str) -> None:
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO otp_codes (email, otp, generated_at, expires_at) VALUES (?, ?, ?, ?)",
+            (email, otp, now, now + self.ttl),
+        )
+        self._puts += 1
+        if self._puts % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM otp_codes WHERE expires_at <= ?", (now,))
+
+    def get(self, email: str) -> Optional[OTPRecord]:
+        row = self._connection().execute(
+            "SELECT otp, generated_at, expires_at FROM otp_codes WHERE email = ? AND expires_at > ?",
+            (email, time.time()),
+        ).fetchone()
+        return OTPRecord(*row) if row else None
+
+    def delete(self, email: str) -> None:
+        self._connection().execute("DELETE FROM otp_codes WHERE email = ?", (email,))
+
+    def __len__(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM otp_codes WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+
+
+class DatabaseOTPStore(OTPStore):
+    """Store in the application database (otp_codes table), shared by every worker and host"""
+
+    PURGE_EVERY = 256
+    blocking = True
+
+    def __init__(self, ttl: float = 300):
+        super().__init__(ttl)
+        # Imported here so the in-process and SQLite backends don't need the application database
+        from utils.models import OTPCode, get_engine
+        self.model = OTPCode
+        self.engine = get_engine()
+        # ON CONFLICT upserts need the dialect's own INSERT construct
+        dialect = {"postgresql": postgresql, "sqlite": sqlite}.get(self.engine.dialect.name)
+        if dialect is None:
+            raise ValueError(f"The database OTP store is not supported on {self.engine.dialect.name}")
+        self._insert = dialect.insert
+        self._puts = 0
+        OTPCode.__table__.create(bind=self.engine, checkfirst=True)
+
+    def put(self, email: str, otp: str) -> None:
+        now = time.time()
+        table = self.model.__table__
+        stmt = self._insert(table).values(email=email, otp=otp, generated_at=now, expires_at=now + self.ttl)
+        # One statement, so concurrent sends for the same email replace each other instead of conflicting
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.email],
+            set_={field: stmt.excluded[field] for field in ("otp", "generated_at", "expires_at")},
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+            self._puts += 1
+            if self._puts % self.PURGE_EVERY == 0:
+                conn.execute(delete(table).where(table.c.expires_at <= now))
+
+    def get(self, email: str) -> Optional[OTPRecord]:
+        table = self.model.__table__
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(table.c.otp, table.c.generated_at, table.c.expires_at)
+                .where(table.c.email == email, table.c.expires_at > time.time())
+            ).first()
+        return OTPRecord(*row) if row else None
+
+    def delete(self, email: str) -> None:
+        table = self.model.__table__
+        with self.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.email == email))
+
+    def __len__(self) -> int:
+        table = self.model.__table__
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).select_from(table).where(table.c.expires_at > time.time())
+            ).scalar()
+
+
+def create_otp_store(backend: Optional[str] = None, ttl: Optional[float] = None) -> OTPStore:
+    """
+    Build the OTP store selected by OTP_STORE:
+    - memory (default): per-process, fastest, only valid with a single worker
+    - sqlite: shared by all workers on one host through OTP_STORE_PATH
+    - database: shared by all workers and hosts through the application database
+    """
+    backend = (backend or os.getenv("OTP_STORE", "memory")).lower()
+    ttl = ttl if ttl is not None else float(os.getenv("OTP_TTL_SECONDS", 300))
+    if backend == "memory":
+        return InMemoryOTPStore(ttl)
+    if backend == "sqlite":
+        return SQLiteOTPStore(os.getenv("OTP_STORE_PATH", "/tmp/safecheck_otp.sqlite3"), ttl)
+    if backend == "database":
+        return DatabaseOTPStore(ttl)
+    raise ValueError(f"Unknown OTP store backend: {backend}")
@@ -0,0 +1,33 @@
+import base64
+from datetime import datetime
+import json
+from typing import Any, List, Optional, Sequence
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque, URL-safe page token for a keyset position (ints, strings and datetimes)"""
+    encoded = [{"dt": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    payload = json.dumps(encoded, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(token: str, types: Optional[Sequence[type]] = None) -> List[Any]:
+    """
+    Keyset position from encode_cursor(); raises ValueError for tokens it didn't produce,
+    or whose values don't match `types` (one type per order field) when given
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list):
+            raise ValueError("cursor is not a list")
+        values = [datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value for value in values]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if types is not None:
+        # bool is an int subclass but never a valid position
+        if len(values) != len(types) or any(
+            isinstance(value, bool) or not isinstance(value, expected) for value, expected in zip(values, types)
+        ):
+            raise ValueError(f"Invalid cursor: expected {', '.join(expected.__name__ for expected in types)}")
+    return values
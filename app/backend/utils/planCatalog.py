@@ -0,0 +1,151 @@
+import asyncio
+from bisect import bisect_right
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from utils.dbHelper import BaseDBHelper
+from utils.models import LICPlan
+
+logger = logging.getLogger(__name__)
+
+# One bit per risk capacity so a plan's accepted risks fit in a single int
+RISK_BITS = {"low": 1, "medium": 2, "high": 4}
+
+
+def _risk_value(risk) -> str:
+    return getattr(risk, "value", risk)
+
+
+class PlanRecord:
+    """Read-only copy of the LICPlan columns used for recommendations"""
+    __slots__ = (
+        "id", "plan_name", "plan_type", "min_age", "max_age",
+        "min_sum_assured", "max_sum_assured", "risk_capacity", "risk_mask", "description",
+    )
+
+    def __init__(self, plan: LICPlan):
+        self.id = plan.id
+        self.plan_name = plan.plan_name
+        self.plan_type = plan.plan_type
+        self.min_age = plan.min_age
+        self.max_age = plan.max_age
+        self.min_sum_assured = plan.min_sum_assured
+        self.max_sum_assured = plan.max_sum_assured
+        self.risk_capacity = tuple(_risk_value(risk) for risk in plan.risk_capacity)
+        self.risk_mask = 0
+        for risk in self.risk_capacity:
+            self.risk_mask |= RISK_BITS.get(risk, 0)
+        self.description = plan.description
+
+
+class PlanCatalog:
+    """
+    Process-local catalog of active LIC plans.
+
+    Plan age ranges are cut into elementary intervals: `_bounds` holds every distinct
+    min_age and max_age + 1 in order, and `_segments[i]` maps each risk bit to the plans
+    (in id order) that cover [_bounds[i], _bounds[i + 1]). A lookup is one bisect plus a
+    dict access, with no database query once the catalog is loaded.
+
+    The catalog reloads after a commit that touched lic_plans in this process (ORM flushes,
+    and the helpers' Core updates, deletes and upserts), on invalidate(), and after
+    PLAN_CATALOG_TTL_SECONDS so other workers pick up changes.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("PLAN_CATALOG_TTL_SECONDS", 300))
+        self.version = 0
+        self._plans: Tuple[PlanRecord, ...] = ()
+        self._bounds: List[int] = []
+        self._segments: List[Dict[int, Tuple[PlanRecord, ...]]] = []
+        self._loaded_at: Optional[float] = None
+        self._signature: Optional[tuple] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def plans(self) -> Tuple[PlanRecord, ...]:
+        return self._plans
+
+    @property
+    def is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return not self.ttl or time.monotonic() - self._loaded_at < self.ttl
+
+    def build(self, plans: Sequence[LICPlan]) -> None:
+        """Replace the catalog contents and rebuild the age/risk index"""
+        records = tuple(sorted((PlanRecord(plan) for plan in plans), key=lambda record: record.id))
+        bounds = sorted({record.min_age for record in records} | {record.max_age + 1 for record in records})
+        segments = []
+        for start in bounds:
+            covering = [record for record in records if record.min_age <= start <= record.max_age]
+            segments.append({
+                bit: tuple(record for record in covering if record.risk_mask & bit)
+                for bit in RISK_BITS.values()
+            })
+
+        self._plans, self._bounds, self._segments = records, bounds, segments
+        self._loaded_at = time.monotonic()
+        # The version only moves when plan contents change, so TTL reloads keep dependent caches warm
+        signature = tuple(tuple(getattr(record, field) for field in PlanRecord.__slots__) for record in records)
+        if signature != self._signature:
+            self._signature = signature
+            self.version += 1
+            logger.info(f"Plan catalog loaded {len(records)} plans (version {self.version})")
+
+    async def load(self, db: AsyncSession) -> None:
+        result = await db.execute(select(LICPlan).filter(LICPlan.is_active == True).order_by(LICPlan.id))  # noqa: E712
+        self.build(result.scalars().all())
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """Load the catalog if it is empty, invalidated or past its TTL"""
+        if self.is_fresh:
+            return
+        async with self._lock:
+            if not self.is_fresh:
+                await self.load(db)
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def candidates(self, age: int, risk_capacity) -> Tuple[PlanRecord, ...]:
+        """Plans whose age range contains `age` and which accept `risk_capacity`"""
+        index = bisect_right(self._bounds, age) - 1
+        if index < 0:
+            return ()
+        return self._segments[index].get(RISK_BITS.get(_risk_value(risk_capacity), 0), ())
+
+
+plan_catalog = PlanCatalog()
+
+
+# Invalidate once a transaction that wrote lic_plans commits, so the reload sees the new rows
+def _mark_plans_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info["lic_plans_changed"] = True
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(LICPlan, _event_name, _mark_plans_changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("lic_plans_changed", False):
+        plan_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("lic_plans_changed", None)
+
+
+# Core writes such as upsert_many(LICPlan, ...) skip the mapper events; the helpers report them after commit
+BaseDBHelper.add_change_listener(LICPlan, lambda ids: plan_catalog.invalidate())
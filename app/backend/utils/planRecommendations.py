@@ -0,0 +1,135 @@
+"""
+plan_recommendations: the eligible plans for every (age, risk_capacity), ranked by base score.
+
+Eligibility and the age/risk part of the match score depend on the profile's age and risk
+capacity only, so they are precomputed for ages 18-100 and every RiskCapacity, both for SQL
+consumers such as the analytics jobs and for the save-user-history route with
+PLAN_RECOMMENDATIONS_SOURCE=table (one primary-key range lookup, then the dependents factor):
+
+    SELECT plan_id, base_score FROM plan_recommendations
+    WHERE age = 40 AND risk_capacity = 'MEDIUM' ORDER BY rank
+
+The table is maintained in the transaction that changes the plans, so its rows commit (or
+roll back) together with the plan change: when a flush inserts, updates or deletes LICPlan
+instances, the ages covered by their old and new age ranges are recomputed; when an
+INSERT, UPDATE or DELETE statement on lic_plans runs through a session (the helpers'
+create_many, upsert_many and COPY path, Core update()/delete()), every age is recomputed
+just before the commit. Only SQL run outside the application (psql, migrations) needs
+`python manage.py rebuild-recommendations` afterwards.
+"""
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from sqlalchemy import delete, event, inspect, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from utils.models import LICPlan, PlanRecommendation, RiskCapacity
+from utils.planCatalog import PlanRecord
+from utils.recommender import match_score, plan_summary
+
+logger = logging.getLogger(__name__)
+
+MIN_AGE, MAX_AGE = 18, 100
+
+
+def recommendation_rows(plans: Sequence[PlanRecord], ages: Iterable[int]) -> Iterator[Dict[str, Any]]:
+    """plan_recommendations rows for `ages`: per risk capacity, eligible plans by base score, ties by id"""
+    for age in ages:
+        covering = [plan for plan in plans if plan.min_age <= age <= plan.max_age]
+        for risk in RiskCapacity:
+            # With no dependents the match score is exactly the age and risk terms
+            ranked = sorted(
+                ((match_score(age, risk.value, 0, plan), plan.id) for plan in covering if risk.value in plan.risk_capacity),
+                key=lambda scored: (-scored[0], scored[1]),
+            )
+            for rank, (score, plan_id) in enumerate(ranked, start=1):
+                yield {"age": age, "risk_capacity": risk, "rank": rank, "plan_id": plan_id, "base_score": score}
+
+
+def rebuild_plan_recommendations(connection: Connection, min_age: int = MIN_AGE, max_age: int = MAX_AGE) -> int:
+    """Recompute the rows for ages min_age..max_age from the active plans; returns the row count"""
+    min_age, max_age = max(min_age, MIN_AGE), min(max_age, MAX_AGE)
+    if min_age > max_age:
+        return 0
+    plans = [
+        PlanRecord(row)
+        for row in connection.execute(
+            select(LICPlan.__table__).where(LICPlan.is_active == True).order_by(LICPlan.id)  # noqa: E712
+        )
+    ]
+    connection.execute(delete(PlanRecommendation).where(PlanRecommendation.age.between(min_age, max_age)))
+    rows = list(recommendation_rows(plans, range(min_age, max_age + 1)))
+    if rows:
+        connection.execute(insert(PlanRecommendation), rows)
+    logger.info(f"Rebuilt plan recommendations for ages {min_age}-{max_age} ({len(rows)} rows)")
+    return len(rows)
+
+
+async def recommend_from_table(db: AsyncSession, age: int, risk_capacity, no_of_dependent: int) -> List[Dict[str, Any]]:
+    """Same result as recommend_plans over the catalog candidates, from one plan_recommendations lookup"""
+    result = await db.execute(
+        select(
+            LICPlan.id, LICPlan.plan_name, LICPlan.plan_type, LICPlan.min_sum_assured, LICPlan.max_sum_assured,
+            LICPlan.description, PlanRecommendation.base_score,
+        )
+        .join(LICPlan, LICPlan.id == PlanRecommendation.plan_id)
+        .filter(PlanRecommendation.age == age, PlanRecommendation.risk_capacity == RiskCapacity(risk_capacity))
+        .order_by(PlanRecommendation.rank)
+    )
+    # Adding the dependents term to the stored base score repeats match_score's float operations exactly
+    dependents_factor = min(no_of_dependent/5, 1)
+    recommended_plans = [plan_summary(row, row.base_score + (dependents_factor * 0.2)) for row in result.all()]
+    # Rounding can merge scores, so re-rank like recommend_plans: highest first, ties in id order
+    recommended_plans.sort(key=lambda plan: (-plan["match_score"], plan["plan_id"]))
+    return recommended_plans
+
+
+# Widen the pending age range to what each flushed plan covered before and after the change
+def _note_plan_ages(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is None:
+        return
+    state = inspect(target)
+    bounds = [target.min_age, target.max_age]
+    for key in ("min_age", "max_age"):
+        bounds.extend(state.attrs[key].history.deleted)
+    bounds = [bound for bound in bounds if bound is not None]
+    if bounds:
+        pending = session.info.get("plan_recommendation_ages")
+        if pending:
+            bounds.extend(pending)
+        session.info["plan_recommendation_ages"] = (min(bounds), max(bounds))
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(LICPlan, _event_name, _note_plan_ages)
+
+
+@event.listens_for(Session, "after_flush")
+def _rebuild_after_flush(session, flush_context):
+    ages = session.info.pop("plan_recommendation_ages", None)
+    if ages:
+        rebuild_plan_recommendations(session.connection(), *ages)
+
+
+# Statements that write lic_plans directly don't say which age ranges they touched
+@event.listens_for(Session, "do_orm_execute")
+def _note_plan_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        # The statement holds an annotated copy of the Table, so compare by name
+        if getattr(orm_execute_state.statement.table, "name", None) == LICPlan.__tablename__:
+            orm_execute_state.session.info["plan_recommendations_stale"] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _rebuild_before_commit(session):
+    if session.info.pop("plan_recommendations_stale", False):
+        rebuild_plan_recommendations(session.connection())
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("plan_recommendation_ages", None)
+    session.info.pop("plan_recommendations_stale", None)
@@ -0,0 +1,205 @@
+"""
+Opt-in SQL profiling (SQL_PROFILING=true) built on engine cursor events.
+
+Each request gets a RequestProfile in a context variable, so statements issued through
+either engine (the async engine runs them in a greenlet of the same task, the sync one in
+a threadpool thread with a copy of the context) are counted against the request that made
+them. The profile is exposed as request.state.db_profile and in the response headers:
+
+    X-DB-Statements: 2
+    Server-Timing: db;dur=1.84
+
+Statements slower than SLOW_QUERY_MS go into a ring buffer of the last SLOW_QUERY_BUFFER,
+with parameter values and quoted literals replaced by "?".
+"""
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+import heapq
+import os
+import re
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+_QUOTED_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def redact_statement(statement: str) -> str:
+    return _WHITESPACE.sub(" ", _QUOTED_LITERAL.sub("'?'", statement)).strip()
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Same shape as the DBAPI parameters, every value replaced by "?" (executemany: first row and a count)"""
+    if isinstance(parameters, dict):
+        return {key: "?" for key in parameters}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {"rows": len(parameters), "first": redact_parameters(parameters[0])}
+        return ["?"] * len(parameters)
+    return "?"
+
+
+class RequestProfile:
+    """Statements issued while handling one request"""
+    __slots__ = ("statements", "db_time", "slowest", "top_n")
+
+    def __init__(self, top_n: int = 3):
+        self.statements = 0
+        self.db_time = 0.0
+        self.top_n = top_n
+        # min-heap of (duration, sequence, statement), so the fastest is dropped first
+        self.slowest: List[Tuple[float, int, str]] = []
+
+    def record(self, statement: str, duration: float) -> None:
+        self.statements += 1
+        self.db_time += duration
+        entry = (duration, self.statements, statement)
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, entry)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "statements": self.statements,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "slowest": [
+                {"duration_ms": round(duration * 1000, 3), "statement": redact_statement(statement)}
+                for duration, _, statement in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("db_profile", default=None)
+
+
+class RouteQueryStats:
+    __slots__ = ("requests", "statements", "db_time", "max_statements")
+
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.db_time = 0.0
+        self.max_statements = 0
+
+
+class QueryProfiler:
+    """Cursor-event listeners, the slow query ring buffer and per-route statement totals"""
+
+    def __init__(self, enabled: Optional[bool] = None, slow_threshold: Optional[float] = None,
+                 buffer_size: Optional[int] = None, top_n: Optional[int] = None):
+        self.enabled = enabled if enabled is not None else os.getenv("SQL_PROFILING", "false").lower() == "true"
+        self.slow_threshold = (
+            slow_threshold if slow_threshold is not None else float(os.getenv("SLOW_QUERY_MS", 100)) / 1000
+        )
+        self.top_n = top_n if top_n is not None else int(os.getenv("SQL_PROFILE_TOP_N", 3))
+        self.slow_queries: Deque[Dict[str, Any]] = deque(
+            maxlen=buffer_size if buffer_size is not None else int(os.getenv("SLOW_QUERY_BUFFER", 200))
+        )
+        self.routes: Dict[Tuple[str, str], RouteQueryStats] = {}
+
+    def attach(self, engine) -> None:
+        """Listen on a sync Engine, or on the sync_engine behind an AsyncEngine; no-op unless enabled"""
+        if not self.enabled:
+            return
+        engine = getattr(engine, "sync_engine", engine)
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @staticmethod
+    def _handle_error(exception_context):
+        # A failed statement gets no after_cursor_execute; drop its start time
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(statement, duration)
+        if duration >= self.slow_threshold:
+            self.slow_queries.append({
+                "at": datetime.utcnow().isoformat(),
+                "duration_ms": round(duration * 1000, 3),
+                "statement": redact_statement(statement),
+                "parameters": redact_parameters(parameters),
+            })
+
+    def start_request(self) -> Tuple[RequestProfile, Any]:
+        profile = RequestProfile(self.top_n)
+        return profile, _current_profile.set(profile)
+
+    def finish_request(self, profile: RequestProfile, token, method: str, route: str) -> None:
+        _current_profile.reset(token)
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteQueryStats()
+        stats.requests += 1
+        stats.statements += profile.statements
+        stats.db_time += profile.db_time
+        stats.max_statements = max(stats.max_statements, profile.statements)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "routes": [
+                {
+                    "method": method,
+                    "route": route,
+                    "requests": stats.requests,
+                    "statements_per_request": round(stats.statements / stats.requests, 2),
+                    "max_statements": stats.max_statements,
+                    "db_time_ms_per_request": round(stats.db_time / stats.requests * 1000, 3),
+                }
+                for (method, route), stats in sorted(self.routes.items())
+            ],
+            "slow_queries": list(reversed(self.slow_queries)),
+        }
+
+
+class QueryProfilerMiddleware:
+    """
+    Pure ASGI middleware opening a RequestProfile per HTTP request. Headers reflect the
+    statements issued before the response started; streamed bodies may issue more, which
+    still count towards request.state.db_profile and the route totals.
+    """
+
+    def __init__(self, app, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        profile, token = self.profiler.start_request()
+        scope.setdefault("state", {})["db_profile"] = profile
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-db-statements", str(profile.statements).encode()),
+                    (b"server-timing", f"db;dur={profile.db_time * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            route = scope.get("route")
+            self.profiler.finish_request(profile, token, scope["method"], getattr(route, "path", "unmatched"))
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,235 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend:
+    """
+    Interface shared by all token-bucket backends. A bucket holds up to `burst` tokens and
+    refills at `rate` tokens per second; a bucket that has refilled completely is the same
+    as one that was never used, so backends only keep buckets that are partly drained.
+    Backends with `blocking` set do I/O, so RateLimiter.check runs them in the threadpool.
+    """
+
+    blocking = False
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens; returns 0 if they were taken, otherwise seconds until they would be"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    @staticmethod
+    def _refill(tokens: float, updated_at: float, now: float, rate: float, burst: float) -> float:
+        return min(burst, tokens + (now - updated_at) * rate)
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process buckets, one (tokens, updated_at, full_at) entry per active key.
+    Entries are kept in update order, so idle ones collect at the front and each acquire()
+    drops the leading entries that have refilled by now: O(1) amortised, no full scans.
+    """
+
+    def __init__(self):
+        self._buckets: "OrderedDict[str, tuple[float, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._buckets.get(key)
+            tokens = burst if entry is None else self._refill(entry[0], entry[1], now, rate, burst)
+            if tokens < cost:
+                return (cost - tokens) / rate
+            tokens -= cost
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            self._buckets.move_to_end(key)
+            return 0.0
+
+    def _expire(self, now: float) -> None:
+        # Buckets with different rates refill at different speeds, so this can stop at a
+        # bucket that is not full yet while a later one is; those go on a later call
+        while self._buckets:
+            key, (_, _, full_at) = next(iter(self._buckets.items()))
+            if full_at > now:
+                break
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in a SQLite file in WAL mode, shared by every worker process on the host that
+    points at the same path. Each acquire is one short IMMEDIATE transaction.
+    """
+
+    PURGE_EVERY = 256
+    # BEGIN IMMEDIATE waits up to the 5 s busy timeout while another worker holds the lock
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._acquires = 0
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+            "updated_at REAL NOT NULL, full_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_buckets_full_at ON rate_buckets (full_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        # Wall-clock time, since the monotonic clock is not comparable across processes
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else self._refill(row[0], row[1], now, rate, burst)
+            if tokens < cost:
+                conn.execute("COMMIT")
+                return (cost - tokens) / rate
+            tokens -= cost
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + (burst - tokens) / rate),
+            )
+            self._acquires += 1
+            if self._acquires % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM rate_buckets WHERE full_at <= ?", (now,))
+            conn.execute("COMMIT")
+            return 0.0
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __len__(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM rate_buckets WHERE full_at > ?", (time.time(),)
+        ).fetchone()[0]
+
+
+def create_rate_limit_backend(backend: Optional[str] = None) -> RateLimitBackend:
+    """
+    Build the bucket backend selected by RATE_LIMIT_BACKEND:
+    - memory (default): per-process, so each worker enforces the limits on its own
+    - sqlite: shared by all workers on one host through RATE_LIMIT_PATH
+    """
+    backend = (backend or os.getenv("RATE_LIMIT_BACKEND", "memory")).lower()
+    if backend == "memory":
+        return InMemoryRateLimitBackend()
+    if backend == "sqlite":
+        return SQLiteRateLimitBackend(os.getenv("RATE_LIMIT_PATH", "/tmp/safecheck_rate_limit.sqlite3"))
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+class RateLimiter:
+    """A named token-bucket policy: `burst` requests at once, then `per_minute` on average per key"""
+
+    def __init__(self, name: str, per_minute: float, burst: float, backend: RateLimitBackend):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.backend = backend
+        self.allowed = 0
+        self.limited = 0
+
+    async def check(self, key: str) -> float:
+        """0 if the request may proceed, otherwise the Retry-After in seconds"""
+        key = f"{self.name}:{key}"
+        if self.backend.blocking:
+            retry_after = await run_in_threadpool(self.backend.acquire, key, self.rate, self.burst)
+        else:
+            retry_after = self.backend.acquire(key, self.rate, self.burst)
+        if retry_after:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def stats(self) -> Dict:
+        return {
+            "per_minute": self.rate * 60,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class Overloaded(Exception):
+    """No admission slot became free in time"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Server busy, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Caps how many requests run a section at once. A request waits at most `max_wait`
+    seconds for a slot and is then rejected with Overloaded instead of queuing indefinitely.
+    """
+
+    def __init__(self, max_concurrent: int, max_wait: float = 0.1, retry_after: float = 1.0):
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @asynccontextmanager
+    async def slot(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(self.retry_after)
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_wait_ms": self.max_wait * 1000,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def retry_after_header(seconds: float) -> Dict[str, str]:
+    """Retry-After takes whole seconds; round up so a client that honours it gets through"""
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+import logging
+from typing import Any, Dict, List, Tuple
+
+from utils.planCatalog import PlanCatalog
+from utils.recommender import recommend_plans
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationCache:
+    """
+    LRU cache of ranked recommendations keyed by the normalized profile
+    (age, risk_capacity, min(no_of_dependent, 5)); the dependents factor is capped at 5,
+    so every larger value ranks and scores identically.
+
+    Entries are tied to the catalog version they were computed from and the whole cache
+    is dropped as soon as the catalog reloads with different plans. Cached lists are
+    shared between requests and must not be mutated.
+    """
+
+    def __init__(self, catalog: PlanCatalog, maxsize: int = 4096):
+        self.catalog = catalog
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[int, str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._version = catalog.version
+
+    def get(self, age: int, risk_capacity, no_of_dependent: int) -> List[Dict[str, Any]]:
+        """Recommendations for a profile, computed from the catalog on a miss"""
+        if self._version != self.catalog.version:
+            self.clear()
+            self._version = self.catalog.version
+
+        key = (age, getattr(risk_capacity, "value", risk_capacity), min(no_of_dependent, 5))
+        recommended_plans = self._entries.get(key)
+        if recommended_plans is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return recommended_plans
+
+        self.misses += 1
+        recommended_plans = recommend_plans(
+            self.catalog.candidates(age, risk_capacity), age, risk_capacity, no_of_dependent
+        )
+        self._entries[key] = recommended_plans
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return recommended_plans
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "catalog_version": self._version,
+        }
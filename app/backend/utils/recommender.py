@@ -0,0 +1,125 @@
+import logging
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from utils.planCatalog import RISK_BITS, PlanRecord
+
+logger = logging.getLogger(__name__)
+
+
+def match_score(age: int, risk_capacity, no_of_dependent: int, plan: PlanRecord) -> float:
+    """Unrounded match score of one plan for one profile"""
+    # Calculate age match score
+    age_match = 1 - abs((age - (plan.min_age + plan.max_age)/2)/100)
+
+    # Calculate risk match score
+    risk_match = 1.0 if risk_capacity in plan.risk_capacity else 0.5
+
+    # Calculate dependents factor
+    dependents_factor = min(no_of_dependent/5, 1)
+
+    # Calculate overall score
+    return (age_match * 0.4) + (risk_match * 0.4) + (dependents_factor * 0.2)
+
+
+def plan_summary(plan: PlanRecord, score: float) -> Dict[str, Any]:
+    return {
+        "plan_id": plan.id,
+        "plan_name": plan.plan_name,
+        "plan_type": plan.plan_type.value,
+        "sum_assured_range": f"{plan.min_sum_assured:,} - {plan.max_sum_assured:,}",
+        "description": plan.description,
+        "match_score": round(score, 2)
+    }
+
+
+def recommend_plans(plans: Sequence[PlanRecord], age: int, risk_capacity, no_of_dependent: int) -> List[Dict[str, Any]]:
+    """Score candidate plans for one profile, highest match first"""
+    recommended_plans = [
+        plan_summary(plan, match_score(age, risk_capacity, no_of_dependent, plan))
+        for plan in plans
+    ]
+    # Sort plans by match score (highest first)
+    recommended_plans.sort(key=lambda x: x["match_score"], reverse=True)
+    return recommended_plans
+
+
+class BatchRecommendations:
+    """
+    Top-k plans for many profiles as dense arrays:
+    - plan_ids[i, j]: id of the j-th best plan for profile i, -1 where it has fewer than k matches
+    - scores[i, j]: the rounded match score of that plan
+    """
+
+    def __init__(self, plan_ids: np.ndarray, scores: np.ndarray, plans: Sequence[PlanRecord]):
+        self.plan_ids = plan_ids
+        self.scores = scores
+        self._plans_by_id = {plan.id: plan for plan in plans}
+
+    def __len__(self) -> int:
+        return len(self.plan_ids)
+
+    def for_profile(self, index: int) -> List[Dict[str, Any]]:
+        """Recommendations for one profile in the same format as the single-profile route"""
+        return [
+            plan_summary(self._plans_by_id[plan_id], score)
+            for plan_id, score in zip(self.plan_ids[index].tolist(), self.scores[index].tolist())
+            if plan_id >= 0
+        ]
+
+
+def recommend_batch(
+    plans: Sequence[PlanRecord],
+    ages: Sequence[int],
+    risk_capacities: Sequence,
+    no_of_dependents: Sequence[int],
+    top_k: int = 3,
+    chunk_size: int = 65536,
+) -> BatchRecommendations:
+    """
+    Score every profile against the whole plan matrix at once and keep the top-k plans.
+
+    Scores are computed with the same floating point operations, in the same order, as
+    match_score, and ranked like recommend_plans (by rounded score, ties in catalog order),
+    so each row equals the first k entries of the single-profile result.
+    """
+    plans = tuple(plans)
+    count = len(ages)
+    top_k = max(0, min(top_k, len(plans)))
+    plan_ids = np.full((count, top_k), -1, dtype=np.int64)
+    scores = np.zeros((count, top_k), dtype=np.float64)
+    if not count or not top_k:
+        return BatchRecommendations(plan_ids, scores, plans)
+
+    ids = np.array([plan.id for plan in plans], dtype=np.int64)
+    min_age = np.array([plan.min_age for plan in plans], dtype=np.int64)
+    max_age = np.array([plan.max_age for plan in plans], dtype=np.int64)
+    risk_mask = np.array([plan.risk_mask for plan in plans], dtype=np.int64)
+    mid_age = (min_age + max_age) / 2
+
+    ages = np.asarray(ages, dtype=np.int64)
+    dependents = np.asarray(no_of_dependents, dtype=np.int64)
+    risk_bits = np.array([RISK_BITS.get(getattr(risk, "value", risk), 0) for risk in risk_capacities], dtype=np.int64)
+
+    for start in range(0, count, chunk_size):
+        stop = min(start + chunk_size, count)
+        age = ages[start:stop, None]
+        eligible = (min_age <= age) & (max_age >= age) & ((risk_mask & risk_bits[start:stop, None]) != 0)
+
+        # Candidate plans always accept the profile's risk capacity, so risk_match is 1.0
+        age_match = 1 - np.abs((age - mid_age) / 100)
+        dependents_factor = np.minimum(dependents[start:stop, None] / 5, 1)
+        raw = (age_match * 0.4) + (1.0 * 0.4) + (dependents_factor * 0.2)
+
+        # round() per distinct value keeps rounding identical to the scalar path
+        unique, inverse = np.unique(raw, return_inverse=True)
+        rounded = np.array([round(value, 2) for value in unique.tolist()])[inverse].reshape(raw.shape)
+
+        ranked = np.argsort(np.where(eligible, -rounded, np.inf), axis=1, kind="stable")[:, :top_k]
+        rows = np.arange(stop - start)[:, None]
+        keep = eligible[rows, ranked]
+        plan_ids[start:stop] = np.where(keep, ids[ranked], -1)
+        scores[start:stop] = np.where(keep, rounded[rows, ranked], 0.0)
+
+    return BatchRecommendations(plan_ids, scores, plans)
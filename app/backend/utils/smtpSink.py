@@ -0,0 +1,141 @@
+"""
+Local SMTP stand-in used to exercise and benchmark email delivery offline.
+
+It speaks just enough SMTP for smtplib (EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT), accepts any credentials, and counts delivered messages instead of
+relaying them. STARTTLS is not offered, so point clients at it with SMTP_USE_TLS=false.
+
+    python -m utils.smtpSink --port 1025 --latency 0.05
+"""
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSMTPSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025, latency: float = 0.0, keep_messages: bool = False):
+        """
+        Args:
+            latency: seconds to sleep before acknowledging each message, to simulate a remote relay
+            keep_messages: keep raw message bodies in `messages` (for inspection in local runs)
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.keep_messages = keep_messages
+        self.messages: List[bytes] = []
+        self.message_count = 0
+        self.connection_count = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connection_count += 1
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        try:
+            await reply("220 localhost SafeCheck SMTP sink ready")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip().upper()
+                if command.startswith("EHLO"):
+                    writer.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n")
+                    await reply("250 SIZE 10485760")
+                elif command.startswith("HELO"):
+                    await reply("250 localhost")
+                elif command.startswith("AUTH LOGIN"):
+                    # Username and password prompts, values are ignored
+                    for _ in range(2 - len(command.split()[2:])):
+                        await reply("334 VXNlcm5hbWU6")
+                        await reader.readline()
+                    await reply("235 2.7.0 Authentication successful")
+                elif command.startswith("AUTH"):
+                    await reply("235 2.7.0 Authentication successful")
+                elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    body = bytearray()
+                    while True:
+                        data_line = await reader.readline()
+                        if not data_line or data_line == b".\r\n":
+                            break
+                        body += data_line
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    self.message_count += 1
+                    if self.keep_messages:
+                        self.messages.append(bytes(body))
+                    await reply("250 OK queued")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                elif command == "STARTTLS":
+                    await reply("454 TLS not available")
+                else:
+                    await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"SMTP sink listening on {self.host}:{self.port}")
+
+    def start_in_thread(self) -> "LocalSMTPSink":
+        """Run the sink on its own event loop in a daemon thread; port=0 picks a free port"""
+        ready = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.serve())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+
+        async def shutdown() -> None:
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before acknowledging each message")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sink = LocalSMTPSink(args.host, args.port, args.latency).start_in_thread()
+    try:
+        while True:
+            time.sleep(5)
+            logger.info(f"{sink.message_count} messages received over {sink.connection_count} connections")
+    except KeyboardInterrupt:
+        sink.stop()
@@ -0,0 +1,20 @@
+from typing import Dict, Iterable, Optional
+
+
+def percentile_ms(samples: Iterable[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of durations in seconds, reported in milliseconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return round(ordered[index] * 1000, 3)
+
+
+def latency_summary(samples: Iterable[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 of durations in seconds, in milliseconds"""
+    samples = list(samples)
+    return {
+        "p50": percentile_ms(samples, 50),
+        "p95": percentile_ms(samples, 95),
+        "p99": percentile_ms(samples, 99),
+    }
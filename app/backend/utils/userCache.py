@@ -0,0 +1,122 @@
+from collections import OrderedDict
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from utils.dbHelper import AsyncDBHelper, BaseDBHelper
+from utils.emailFilter import RegisteredEmailFilter, registered_emails
+from utils.models import User
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_COLUMNS = ("id", "name", "email", "is_active")
+
+
+class UserIdentity:
+    """The User columns the OTP routes need, without an ORM instance"""
+    __slots__ = IDENTITY_COLUMNS
+
+    def __init__(self, id: int, name: str, email: str, is_active: bool):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.is_active = is_active
+
+
+class UserIdentityCache:
+    """
+    Read-through LRU cache of email -> UserIdentity with a TTL.
+
+    Misses load only IDENTITY_COLUMNS. Entries are dropped as soon as a DBHelper commits an
+    update, delete or upsert of the user (see BaseDBHelper.add_change_listener); writes made
+    outside the helpers, or by other workers, are picked up when the entry expires.
+    Unknown emails are not cached, so a new signup is visible immediately; with an
+    `email_filter`, misses for emails it rules out are answered without a query, and a
+    signup on another worker can take up to the filter's sync interval to be seen.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, maxsize: Optional[int] = None,
+                 email_filter: Optional[RegisteredEmailFilter] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+        self.maxsize = maxsize if maxsize is not None else int(os.getenv("USER_CACHE_SIZE", 10000))
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.filtered = 0
+        self.email_filter = email_filter
+        self._entries: "OrderedDict[str, tuple[float, UserIdentity]]" = OrderedDict()
+        self._emails_by_id: Dict[int, str] = {}
+
+    def get(self, email: str) -> Optional[UserIdentity]:
+        """Cached identity for `email`, or None if it isn't cached or has expired"""
+        entry = self._entries.get(email)
+        if entry is None:
+            return None
+        expires_at, identity = entry
+        if expires_at <= time.monotonic():
+            self._discard(email)
+            return None
+        self._entries.move_to_end(email)
+        return identity
+
+    def put(self, identity: UserIdentity) -> None:
+        self._discard(identity.email)
+        self._entries[identity.email] = (time.monotonic() + self.ttl, identity)
+        self._emails_by_id[identity.id] = identity.email
+        while len(self._entries) > self.maxsize:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._emails_by_id.pop(evicted.id, None)
+
+    async def lookup(self, db: AsyncSession, email: str) -> Optional[UserIdentity]:
+        """Identity for `email` from the cache, or from a projected query on a miss"""
+        identity = self.get(email)
+        if identity is not None:
+            self.hits += 1
+            return identity
+
+        self.misses += 1
+        if self.email_filter is not None and not await self.email_filter.might_exist(db, email):
+            self.filtered += 1
+            return None
+        row = await AsyncDBHelper(db).get_columns_by_field(User, "email", email, IDENTITY_COLUMNS)
+        if row is None:
+            return None
+        identity = UserIdentity(row.id, row.name, email, row.is_active)
+        self.put(identity)
+        return identity
+
+    def invalidate_ids(self, user_ids: Sequence[Any]) -> None:
+        for user_id in user_ids:
+            email = self._emails_by_id.get(user_id)
+            if email is not None:
+                self._discard(email)
+                self.invalidations += 1
+
+    def _discard(self, email: str) -> None:
+        entry = self._entries.pop(email, None)
+        if entry is not None:
+            self._emails_by_id.pop(entry[1].id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._emails_by_id.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "filtered_unknown_emails": self.filtered,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+user_identity_cache = UserIdentityCache(email_filter=registered_emails)
+BaseDBHelper.add_change_listener(User, user_identity_cache.invalidate_ids)
@@ -0,0 +1,229 @@
+"""
+Bulk user import from CSV with the /signup/ validation rules.
+
+Records are validated as they are read and loaded in batches of multi-row
+INSERT ... ON CONFLICT (email) DO NOTHING, one commit per batch, so memory is bounded by
+the batch size and the capped error report whatever the file size. Emails that already
+exist (or repeat within the file) are reported per row as duplicates instead of failing the batch.
+A batch the database rejects (a constraint the validators don't cover) is rolled back and
+retried row by row, so only the offending rows fail and they are listed in the report.
+"""
+import codecs
+import csv
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from utils import validators
+from utils.dbHelper import AsyncDBHelper, DBHelper
+from utils.models import User
+
+IMPORT_COLUMNS = ("name", "email", "dateOfBirth")
+IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", 1000))
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("USER_IMPORT_MAX_REPORTED_ERRORS", 1000))
+
+# Errors that mean the database refused the rows' values, as opposed to a failing connection
+REJECTED_ROW_ERRORS = (IntegrityError, DataError)
+
+
+class ImportReport:
+    """Running totals plus the first `max_errors` failed rows (by CSV line number)"""
+
+    def __init__(self, max_errors: int = IMPORT_MAX_REPORTED_ERRORS):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def reject(self, line: int, email: Optional[str], messages: List[str]) -> None:
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "email": email, "errors": messages})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "errors_truncated": self.duplicates + self.invalid > len(self.errors),
+        }
+
+
+class UserImportBatcher:
+    """Validates CSV records and groups the valid ones into insert batches"""
+
+    def __init__(self, report: ImportReport, batch_size: int = IMPORT_BATCH_SIZE):
+        self.report = report
+        self.batch_size = batch_size
+        self._columns: Optional[Dict[str, int]] = None
+        self._batch: List[Tuple[int, Dict[str, Any]]] = []
+        self._emails: Dict[str, int] = {}
+
+    def header(self, fields: Sequence[str]) -> None:
+        columns = {name.strip(): index for index, name in enumerate(fields)}
+        missing = [name for name in IMPORT_COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"CSV header is missing {', '.join(missing)}; expected {', '.join(IMPORT_COLUMNS)}")
+        self._columns = columns
+
+    def add(self, line: int, fields: Sequence[str]) -> Optional[List[Tuple[int, Dict[str, Any]]]]:
+        """Validate one record; returns a full batch to insert when one is ready"""
+        if not any(field.strip() for field in fields):
+            return None
+        if self._columns is None:
+            self.header(fields)
+            return None
+
+        self.report.rows += 1
+        values = {name: fields[index] if index < len(fields) else "" for name, index in self._columns.items()}
+        errors = []
+        cleaned = {}
+        for name, validate in (("name", validators.validate_name), ("email", validators.validate_email),
+                               ("dateOfBirth", validators.parse_date_of_birth)):
+            try:
+                cleaned[name] = validate(values[name])
+            except ValueError as e:
+                errors.append(f"{name}: {e}")
+        email = cleaned.get("email", values["email"].strip() or None)
+        if errors:
+            self.report.invalid += 1
+            self.report.reject(line, email, errors)
+            return None
+        if email in self._emails:
+            self.report.duplicates += 1
+            self.report.reject(line, email, [f"email: duplicate of line {self._emails[email]}"])
+            return None
+
+        birth_date = cleaned["dateOfBirth"]
+        self._emails[email] = line
+        self._batch.append((line, {
+            "name": cleaned["name"],
+            "email": email,
+            "date_of_birth": birth_date.day,
+            "month_of_birth": birth_date.month,
+            "year_of_birth": birth_date.year,
+            "is_active": True,
+            "is_verified": False,
+        }))
+        return self.take() if len(self._batch) >= self.batch_size else None
+
+    def take(self) -> List[Tuple[int, Dict[str, Any]]]:
+        batch, self._batch, self._emails = self._batch, [], {}
+        return batch
+
+    def inserted(self, batch: List[Tuple[int, Dict[str, Any]]], created: Dict[Any, int]) -> None:
+        """Record the outcome of a batch given upsert_many's {email: id} for the rows it inserted"""
+        self.report.imported += len(created)
+        for line, row in batch:
+            if row["email"] not in created:
+                self.report.duplicates += 1
+                self.report.reject(line, row["email"], ["email: Email already registered"])
+
+    def rejected(self, line: int, row: Dict[str, Any], error: Exception) -> None:
+        """Record a row the database refused when it was retried on its own"""
+        self.report.invalid += 1
+        self.report.reject(line, row["email"], [f"database: {getattr(error, 'orig', error)}"])
+
+
+def import_users(db: Session, rows: Iterable[Tuple[int, Sequence[str]]], batch_size: int = IMPORT_BATCH_SIZE,
+                 max_errors: int = IMPORT_MAX_REPORTED_ERRORS) -> ImportReport:
+    """Import (line number, fields) records, header first, through a sync session"""
+    report = ImportReport(max_errors)
+    batcher = UserImportBatcher(report, batch_size)
+    db_helper = DBHelper(db)
+
+    def load(batch):
+        if not batch:
+            return
+        try:
+            batcher.inserted(batch, db_helper.upsert_many(
+                User, [row for _, row in batch], ["email"], update_fields=[], chunk_size=batch_size
+            ))
+        except REJECTED_ROW_ERRORS:
+            # upsert_many rolled the batch back; retry its rows one by one to find the rejected ones
+            for line, row in batch:
+                try:
+                    batcher.inserted([(line, row)], db_helper.upsert_many(User, [row], ["email"], update_fields=[]))
+                except REJECTED_ROW_ERRORS as e:
+                    batcher.rejected(line, row, e)
+
+    for line, fields in rows:
+        load(batcher.add(line, fields))
+    load(batcher.take())
+    return report
+
+
+async def aimport_users(db: AsyncSession, rows: AsyncIterator[Tuple[int, Sequence[str]]],
+                        batch_size: int = IMPORT_BATCH_SIZE,
+                        max_errors: int = IMPORT_MAX_REPORTED_ERRORS) -> ImportReport:
+    """Import (line number, fields) records, header first, through an async session"""
+    report = ImportReport(max_errors)
+    batcher = UserImportBatcher(report, batch_size)
+    db_helper = AsyncDBHelper(db)
+
+    async def load(batch):
+        if not batch:
+            return
+        try:
+            batcher.inserted(batch, await db_helper.upsert_many(
+                User, [row for _, row in batch], ["email"], update_fields=[], chunk_size=batch_size
+            ))
+        except REJECTED_ROW_ERRORS:
+            # upsert_many rolled the batch back; retry its rows one by one to find the rejected ones
+            for line, row in batch:
+                try:
+                    batcher.inserted([(line, row)], await db_helper.upsert_many(
+                        User, [row], ["email"], update_fields=[]
+                    ))
+                except REJECTED_ROW_ERRORS as e:
+                    batcher.rejected(line, row, e)
+
+    async for line, fields in rows:
+        await load(batcher.add(line, fields))
+    await load(batcher.take())
+    return report
+
+
+def csv_file_records(stream) -> Iterable[Tuple[int, List[str]]]:
+    """(starting line number, fields) for each record of an open text file"""
+    reader = csv.reader(stream)
+    line = 1
+    for fields in reader:
+        yield line, fields
+        line = reader.line_num + 1
+
+
+async def csv_stream_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, List[str]]]:
+    """
+    (starting line number, fields) for each record of a UTF-8 CSV arriving in byte chunks.
+    Lines are held back only while a quoted field spans them, so memory stays at about one chunk.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    record: List[str] = []
+    quotes = 0
+    line = 1
+    start = 1
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for text in lines:
+            record.append(text)
+            quotes += text.count('"')
+            line += 1
+            if quotes % 2 == 0:
+                yield start, next(csv.reader(["\n".join(record)]), [])
+                record, quotes, start = [], 0, line
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        record.append(pending)
+    if record:
+        yield start, next(csv.reader(["\n".join(record)]), [])
@@ -0,0 +1,49 @@
+"""
+Field rules for user signups, shared by UserCreateRequest and the bulk CSV import.
+Each validator returns the cleaned value or raises ValueError with the message shown to the client.
+"""
+from datetime import date, datetime
+import re
+
+from pydantic.networks import validate_email as _validate_email
+
+NAME_PATTERN = re.compile(r'^[a-zA-Z\s\-]+$')
+MIN_SIGNUP_AGE = 18
+# Same bound as the users.year_of_birth CHECK constraint, which bulk inserts hit without the ORM validators
+MIN_BIRTH_YEAR = 1900
+
+
+def validate_name(v: str) -> str:
+    v = v.strip()
+    if len(v) < 2:
+        raise ValueError('Name must be at least 2 characters')
+    if not NAME_PATTERN.match(v):
+        raise ValueError('Name can only contain letters, spaces and hyphens')
+    return v
+
+
+def validate_email(v: str) -> str:
+    """Normalised address, as EmailStr would produce it"""
+    try:
+        return _validate_email(v.strip())[1]
+    except Exception:
+        raise ValueError('value is not a valid email address')
+
+
+def parse_date_of_birth(v: str) -> date:
+    try:
+        birth_date = datetime.strptime(v, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+
+    today = datetime.now().date()
+    if birth_date.year < MIN_BIRTH_YEAR:
+        raise ValueError(f'Birth year must be {MIN_BIRTH_YEAR} or later')
+    if birth_date > today:
+        raise ValueError('Birth date cannot be in the future')
+
+    age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+    if age < MIN_SIGNUP_AGE:
+        raise ValueError('User must be at least 18 years old')
+
+    return birth_date